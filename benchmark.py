@@ -0,0 +1,244 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import fantasy
+
+# Generates synthetic seasons in the exact formats fantasy.py reads (the raw Sleeper players dump, weekly stats
+# payloads, weekN/{pos}.txt rankings with every expert's ranks and weekN/love_hate.txt), then times each stage of the
+# pipeline at several sizes. Every run is appended to a JSON lines file so that results can be compared over time:
+#   python benchmark.py --players 2000,10000,40000 --weeks 17 --ranked 200
+
+TEAMS = [("ARI", "Cardinals"), ("ATL", "Falcons"), ("BAL", "Ravens"), ("BUF", "Bills"), ("CAR", "Panthers"),
+	("CHI", "Bears"), ("CIN", "Bengals"), ("CLE", "Browns"), ("DAL", "Cowboys"), ("DEN", "Broncos"), ("DET", "Lions"),
+	("GB", "Packers"), ("HOU", "Texans"), ("IND", "Colts"), ("JAX", "Jaguars"), ("KC", "Chiefs"), ("LAC", "Chargers"),
+	("LAR", "Rams"), ("MIA", "Dolphins"), ("MIN", "Vikings"), ("NE", "Patriots"), ("NO", "Saints"), ("NYG", "Giants"),
+	("NYJ", "Jets"), ("OAK", "Raiders"), ("PHI", "Eagles"), ("PIT", "Steelers"), ("SEA", "Seahawks"), ("SF", "49ers"),
+	("TB", "Buccaneers"), ("TEN", "Titans"), ("WAS", "Redskins")]
+OFFENSE_POSITIONS = ["QB", "RB", "WR", "TE"]
+OTHER_POSITIONS = ["K", "OL", "DL", "LB", "DB"]
+SYLLABLES = ["ja", "mar", "ri", "co", "de", "an", "tho", "ny", "ke", "lin", "bro", "son", "ty", "ler", "da", "vis",
+	"mo", "ham", "ed", "wa", "ju", "li", "us", "ter", "ron", "ca", "lo", "ste", "fon", "zo"]
+NUM_EXPERTS = 6
+STAGES = ["players_ingest", "players_load", "stats_ingest", "rankings_parse", "correlation", "love_hate", "cumulative"]
+
+def getRandomName(rng):
+	first = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+	last = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+	return first, last
+
+def generatePlayers(num_players, rng):
+	players = dict()
+	for abbreviation, nickname in TEAMS:
+		players[abbreviation] = {"player_id": abbreviation, "first_name": abbreviation, "last_name": nickname,
+			"position": "DEF", "team": abbreviation, "active": True, "fantasy_positions": ["DEF"]}
+
+	names = set()
+	player_id = 1000
+	while len(players) < num_players + len(TEAMS):
+		first, last = getRandomName(rng)
+		if (first, last) in names: continue
+		names.add((first, last))
+
+		position = rng.choice(OFFENSE_POSITIONS * 2 + OTHER_POSITIONS)
+		players[str(player_id)] = {"player_id": str(player_id), "first_name": first, "last_name": last,
+			"full_name": "{} {}".format(first, last), "position": position, "team": rng.choice(TEAMS)[0],
+			"active": rng.random() < 0.7, "height": "6'{}\"".format(rng.randint(0, 11)), "weight": str(rng.randint(170, 330)),
+			"college": "State", "injury_status": None, "fantasy_positions": [position], "rotowire_id": rng.randint(1, 99999)}
+		player_id += 1
+
+	return players
+
+def generateWeekStats(players, rng):
+	stats = dict()
+	for player_id, player in players.items():
+		position = player["position"]
+		if position == "DEF":
+			s = {"sack": rng.randint(0, 6), "int": rng.randint(0, 3), "fum_rec": rng.randint(0, 2), "def_td": int(rng.random() < 0.15),
+				"safe": int(rng.random() < 0.03), "pts_allow": rng.randint(0, 42)}
+			s["pts_std"] = s["sack"] + 2 * (s["int"] + s["fum_rec"] + s["safe"]) + 6 * s["def_td"] + max(0, 10 - s["pts_allow"] // 3)
+			s["pts_ppr"] = s["pts_half_ppr"] = s["pts_std"]
+		elif position in OFFENSE_POSITIONS and player["active"]:
+			s = dict()
+			if position == "QB":
+				s.update({"pass_att": rng.randint(15, 50), "pass_yd": rng.randint(80, 420), "pass_td": rng.randint(0, 5), "pass_int": rng.randint(0, 3)})
+			if position in ["QB", "RB"]:
+				s.update({"rush_att": rng.randint(0, 25), "rush_yd": rng.randint(-5, 150), "rush_td": rng.randint(0, 2)})
+			if position != "QB":
+				s.update({"rec_tgt": rng.randint(0, 12), "rec": rng.randint(0, 10), "rec_yd": rng.randint(0, 160), "rec_td": rng.randint(0, 2)})
+			s["fum_lost"] = int(rng.random() < 0.05)
+			s["pts_std"] = round(s.get("pass_yd", 0) * 0.04 + 4 * s.get("pass_td", 0) - 2 * s.get("pass_int", 0) + 0.1 * (s.get("rush_yd", 0) + s.get("rec_yd", 0)) +
+				6 * (s.get("rush_td", 0) + s.get("rec_td", 0)) - 2 * s["fum_lost"], 2)
+			s["pts_half_ppr"] = s["pts_std"] + 0.5 * s.get("rec", 0)
+			s["pts_ppr"] = s["pts_std"] + s.get("rec", 0)
+		elif rng.random() < 0.3:
+			s = {"gp": 1}
+		else:
+			continue
+
+		stats[player_id] = s
+
+	return stats
+
+def writeRankingsFile(path, players, player_ids, position, rng):
+	# The consensus order is a noisy version of each player's underlying quality, and every expert adds their own noise.
+	quality = {player_id: rng.random() for player_id in player_ids}
+	expert_ranks = list()
+	for _ in range(NUM_EXPERTS):
+		order = sorted(player_ids, key=lambda player_id: quality[player_id] + rng.gauss(0, 0.1))
+		expert_ranks.append({player_id: rank for rank, player_id in enumerate(order, start=1)})
+
+	cutoff = int(len(player_ids) * 0.9) # Experts leave the tail of their rankings unranked ("NR").
+	averages = {player_id: sum(min(ranks[player_id], cutoff + 1) for ranks in expert_ranks) / NUM_EXPERTS for player_id in player_ids}
+
+	with open(path, "w") as rankings_file:
+		for rank, player_id in enumerate(sorted(player_ids, key=averages.get), start=1):
+			player = players[player_id]
+			name = "{} D/ST".format(player["last_name"]) if position == "def" else player["full_name"]
+			columns = [str(ranks[player_id]) if ranks[player_id] <= cutoff else "NR" for ranks in expert_ranks]
+			rankings_file.write("{}. {}, {}\n".format(rank, name, player["team"].capitalize()))
+			rankings_file.write("{}\t{}\t{:.1f}\n".format(rng.choice(TEAMS)[0].capitalize(), "\t".join(columns), averages[player_id]))
+
+def writeLoveHateFile(path, players, ranked_ids, rng, picks_per_position=6):
+	with open(path, "w") as lh_file:
+		for position in OFFENSE_POSITIONS:
+			for lh in ["L", "H"]:
+				for player_id in rng.sample(ranked_ids[position.lower()], min(picks_per_position, len(ranked_ids[position.lower()]))):
+					lh_file.write("{}/{}/{}\n".format(position, lh, players[player_id]["full_name"]))
+
+def generateSeason(directory, num_players, num_weeks, num_ranked, seed=0):
+	rng = random.Random(seed)
+	players = generatePlayers(num_players, rng)
+	with open(os.path.join(directory, "players.json"), "w") as players_file:
+		json.dump(players, players_file)
+
+	ids_by_position = dict()
+	for player_id, player in players.items():
+		if player["position"] == "DEF" or (player["position"] in OFFENSE_POSITIONS and player["active"]):
+			ids_by_position.setdefault(player["position"].lower(), list()).append(player_id)
+
+	weeks_stats = dict()
+	for week in range(1, num_weeks + 1):
+		weeks_stats[week] = generateWeekStats(players, rng)
+
+		week_directory = os.path.join(directory, "week{}".format(week))
+		os.makedirs(week_directory, exist_ok=True)
+		ranked_ids = dict()
+		for position, player_ids in ids_by_position.items():
+			ranked_ids[position] = rng.sample(player_ids, min(num_ranked, len(player_ids)))
+			writeRankingsFile(os.path.join(week_directory, "{}.txt".format(position)), players, ranked_ids[position], position, rng)
+		writeLoveHateFile(os.path.join(week_directory, "love_hate.txt"), players, ranked_ids, rng)
+
+	return weeks_stats
+
+def resetState():
+	fantasy.PLAYER_REGISTRY = None
+	fantasy.NAME_INDEX = None
+	fantasy.WEEK_STATS_MEMO.clear()
+	fantasy.WEEK_STATS_HASHES.clear()
+	fantasy.WEEK_PARTITIONS.clear()
+
+def timeStage(timings, stage, fn, repeat):
+	# Keeps the best of several runs, which is the least noisy estimate of what the code itself costs.
+	best = None
+	for _ in range(repeat):
+		start = time.perf_counter()
+		result = fn()
+		elapsed = time.perf_counter() - start
+		best = elapsed if best is None else min(best, elapsed)
+
+	timings[stage] = best
+	return result
+
+def benchmarkSize(num_players, num_weeks, num_ranked, repeat):
+	with tempfile.TemporaryDirectory() as directory:
+		weeks_stats = generateSeason(directory, num_players, num_weeks, num_ranked)
+		weeks = list(weeks_stats)
+
+		cwd = os.getcwd()
+		os.chdir(directory)
+		fantasy.OFFLINE = True
+		fantasy.STATS_CACHE_DIR = os.path.join(directory, "stats_cache")
+		fantasy.RESULTS_CACHE_DIR = "" # Time the analysis itself rather than cache hits.
+		resetState()
+
+		try:
+			timings = dict()
+			timeStage(timings, "players_ingest", lambda: fantasy.fixJsonFile("players.json"), repeat)
+			fantasy.PLAYER_REGISTRY = timeStage(timings, "players_load", fantasy.readPlayersSnapshot, repeat)
+
+			for week, stats in weeks_stats.items():
+				fantasy.writeCachedStats(week, stats)
+
+			def ingestStats():
+				fantasy.WEEK_STATS_MEMO.clear()
+				fantasy.WEEK_PARTITIONS.clear()
+				return [fantasy.getWeekPartition(week, fantasy.getWeekStats(week)) for week in weeks]
+			timeStage(timings, "stats_ingest", ingestStats, repeat)
+
+			def parseRankings():
+				return {(week, position): fantasy.parseExpertRankings(os.path.join("week{}".format(week), "{}.txt".format(position)), position)
+					for week in weeks for position in fantasy.ALL_POSITIONS_LIST}
+			parsed = timeStage(timings, "rankings_parse", parseRankings, repeat)
+
+			def correlate():
+				for (week, position), (rankings_list, ranks, experts, teams) in parsed.items():
+					stats = fantasy.getWeekStats(week)
+					predicted_ids = fantasy.resolveRankings(rankings_list, teams, position, stats)
+					actual_ids = fantasy.getWeekPartition(week, stats).ids[position]
+					fantasy.compareRankings(predicted_ids, actual_ids)
+					fantasy.compareExpertRankings(predicted_ids, ranks, actual_ids, experts)
+			timeStage(timings, "correlation", correlate, repeat)
+
+			def loveHate():
+				return [fantasy.analyzeWeek(week, fantasy.getWeekStats(week), sources=["love_hate"]) for week in weeks]
+			timeStage(timings, "love_hate", loveHate, repeat)
+
+			all_week_results = [fantasy.analyzeWeek(week, fantasy.getWeekStats(week)) for week in weeks]
+			def cumulative():
+				season_results = fantasy.SeasonResults()
+				for week_results in all_week_results:
+					season_results.add(week_results)
+				return season_results.getSummary()
+			timeStage(timings, "cumulative", cumulative, repeat)
+		finally:
+			os.chdir(cwd)
+			resetState()
+
+	return timings
+
+def getGitCommit():
+	try:
+		return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+			stderr=subprocess.DEVNULL).decode().strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Time every stage of fantasy.py on synthetic seasons.")
+	parser.add_argument("--players", default="2000,10000,40000", help="comma-separated player database sizes")
+	parser.add_argument("--weeks", type=int, default=17, help="number of weeks per season")
+	parser.add_argument("--ranked", type=int, default=200, help="players ranked per position per week")
+	parser.add_argument("--repeat", type=int, default=3, help="runs per stage (the best one is kept)")
+	parser.add_argument("--output", default="benchmark_results.jsonl", help="JSON lines file that each run is appended to")
+	options = parser.parse_args()
+
+	run = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": getGitCommit(), "python": platform.python_version(),
+		"weeks": options.weeks, "ranked": options.ranked, "sizes": dict()}
+
+	print("{:>10}".format("players") + "".join("{:>16}".format(stage) for stage in STAGES))
+	for num_players in [int(size) for size in options.players.split(",")]:
+		timings = benchmarkSize(num_players, options.weeks, options.ranked, options.repeat)
+		run["sizes"][num_players] = timings
+		print("{:>10}".format(num_players) + "".join("{:>15.4f}s".format(timings[stage]) for stage in STAGES))
+		sys.stdout.flush()
+
+	with open(options.output, "a") as output_file:
+		output_file.write(json.dumps(run) + "\n")
+	print("\nAppended the results to {}".format(options.output))
@@ -1,92 +1,970 @@
+import argparse
+import ast
+import atexit
+import cProfile
+import csv
+import difflib
+import functools
+import gzip
+import hashlib
+import http.server
 import json
+import numpy as np
 import os
+import pstats
 import re
 import requests
+import struct
 import sys
+import threading
+import time
 import warnings
 
+from collections import Counter, deque
 from colorama import init, Fore, Back, Style
-from datetime import date
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, timedelta
+from requests.adapters import HTTPAdapter
 from scipy.stats import kendalltau
+from urllib3.util.retry import Retry
 
-PLAYER_ID_CACHE = dict()
-POSITION_POINTS_DICT = dict()
+WEEK_PARTITIONS = dict() # Maps from (season, week, scoring profile) to that week's WeekPartition.
 ALL_POSITIONS_LIST = ["qb", "rb", "wr", "te", "def"]
+LOVE_HATE_POSITIONS_LIST = ["QB", "RB", "WR", "TE"]
+ALL_SOURCES_LIST = ["rankings", "love_hate"]
+RANKING_METRICS_LIST = ["coefficient", "avg_difference", "spearman", "precision_at_k", "ndcg_at_k"]
+TOP_K = 10 # Cutoff for the top-k precision and NDCG metrics.
+RESAMPLES = int(os.environ.get("FANTASY_RESAMPLES", "2000")) # Permutations and bootstrap draws per significance test.
+RESAMPLE_CHUNK = 250 # Permutations scored per vectorized batch, which bounds memory to about chunk x n x n.
+RESAMPLE_SEED = 0
+CONFIDENCE = 0.95
+ROLLING_WINDOW = 4 # Weeks in the sliding-window accuracy series.
+EWMA_ALPHA = 0.5 # Weight of the newest week in the exponentially weighted accuracy series.
+CUMULATIVE_TOP_N = 15 # How many players the cumulative rankings show per position.
+PER_GAME_MIN_GAMES = 3 # Games a player needs to qualify for per-game averages.
+
+SEASON = 2019
+
+# Scoring profiles weight the raw per-stat fields of Sleeper's weekly stats. "stats" applies to every position,
+# "positions" overrides it per position, and "points_allowed" lists [most points allowed, fantasy points] tiers for
+# defenses, ending with a null catch-all. A profile can extend another. More can be defined in SCORING_PROFILES_PATH.
+SCORING_PROFILES = {
+	"sleeper": {"stats": {"pts_ppr": 1}, "positions": {"def": {"pts_ppr": 0, "pts_std": 1}}}, # Sleeper's own totals.
+	"standard": {
+		"stats": {"pass_yd": 0.04, "pass_td": 4, "pass_int": -1, "pass_2pt": 2, "rush_yd": 0.1, "rush_td": 6, "rush_2pt": 2,
+			"rec_yd": 0.1, "rec_td": 6, "rec_2pt": 2, "fum_lost": -2},
+		"positions": {"def": {"sack": 1, "int": 2, "fum_rec": 2, "safe": 2, "def_td": 6, "def_st_td": 6, "blk_kick": 2}},
+		"points_allowed": [[0, 10], [6, 7], [13, 4], [20, 1], [27, 0], [34, -1], [None, -4]],
+	},
+	"ppr": {"extends": "standard", "stats": {"rec": 1}},
+	"half_ppr": {"extends": "standard", "stats": {"rec": 0.5}},
+	"te_premium": {"extends": "ppr", "positions": {"te": {"rec": 1.5}}},
+	"6pt_pass_td": {"extends": "ppr", "stats": {"pass_td": 6}},
+}
+SCORING_PROFILES_PATH = "scoring_profiles.json"
+SCORING_PROFILE = "sleeper" # The profile used unless one is asked for; --scoring=<name> changes it.
+SLEEPER_API_URL = os.environ.get("SLEEPER_API_URL", "https://api.sleeper.app/v1")
+OFFLINE = os.environ.get("FANTASY_OFFLINE", "0") not in ["", "0"]
+
+STATS_CACHE_DIR = os.environ.get("FANTASY_STATS_CACHE", "stats_cache")
+STATS_CACHE_VERSION = 1
+STATS_CACHE_TTL = 60 * 60 # Seconds before stats for a week that isn't over yet get refetched.
+STATS_FINAL_DAYS = 10 # Days after a week's Sunday until its stat corrections are in and its stats are final.
+WEEK_STATS_MEMO = dict() # Maps from (season, week) to stats that were already loaded by this process.
+WEEK_STATS_HASHES = dict() # Maps from (season, week) to the SHA-1 of the stats payload in the cache.
+
+RESULTS_CACHE_DIR = os.environ.get("FANTASY_RESULTS_CACHE", "results_cache") # Set to an empty string to disable.
+RESULTS_CACHE_VERSION = 4 # Bump whenever the analysis changes, which invalidates every cached result.
+
+STORE_DIR = os.environ.get("FANTASY_STORE", "rankings_store") # Built by "python fantasy.py import".
+STORE_VERSION = 2
+STORE_TABLES = {
+	"rankings": ["season", "week", "position", "player_id", "name", "team", "ranks"],
+	"love_hate": ["season", "week", "position", "player_id", "name", "love"],
+}
+RANKINGS_STORE = None # Opened once per process by getRankingsStore().
+
+PROFILE_MODE = os.environ.get("FANTASY_PROFILE", "0") # "1" for timing spans and counters, "cprofile" to also run cProfile.
+PROFILE_MODE = PROFILE_MODE if PROFILE_MODE not in ["", "0"] else "" # Off when unset or "0", like FANTASY_OFFLINE.
+PROFILE_OUTPUT = os.environ.get("FANTASY_PROFILE_OUTPUT", "") # Write the report to this JSON file instead of printing it.
+PROFILED_FUNCTIONS_LIST = ["fixJsonFile", "readPlayersSnapshot", "getWeekStats", "getWeekPartition",
+	"getCumulativeRankings", "parseExpertRankings", "compareRankings", "compareExpertRankings", "scoreLoveHate", "analyzeWeek", "analyzeWeekProfiles",
+	"printCumulativeResults"]
+PROFILE_SPANS = dict() # Maps from function name to [calls, total seconds].
+PROFILE_COUNTERS = dict() # Maps from counter name (e.g. http_calls) to its count.
+PROFILE_LOCK = threading.Lock() # Stats get fetched from several threads at once.
+PROFILER = None
+
+HTTP_SESSION = None # Shared, connection-pooled session created by getHttpSession().
+HTTP_SESSION_LOCK = threading.Lock() # So that prefetch threads all share the one session.
+HTTP_RETRIES = 4
+PREFETCH_WORKERS = 6 # Upper bound on concurrent requests to the Sleeper API.
+
+PLAYERS_SNAPSHOT_PATH = "players.snapshot"
+PLAYERS_SNAPSHOT_MAGIC = b"FFPLAYRS"
+PLAYERS_SNAPSHOT_VERSION = 2
+PLAYER_REGISTRY = None # Loaded once per process by getPlayerRegistry().
+NAME_INDEX = None # Built once per process from the registry by getNameIndex().
+
+NAME_SUFFIXES = {"jr", "sr", "ii", "iii", "iv", "v"}
+FIRST_NAME_ALIASES = {"mitchell": "mitch", "benjamin": "ben", "christopher": "chris", "joshua": "josh", "matthew": "matt",
+	"michael": "mike", "robert": "rob", "william": "will", "daniel": "dan", "nicholas": "nick", "anthony": "tony",
+	"kenneth": "ken", "gregory": "greg", "jeffery": "jeff", "jeffrey": "jeff", "jonathan": "jon", "zachary": "zach",
+	"patrick": "pat", "samuel": "sam", "joseph": "joe", "james": "jim", "timothy": "tim", "thomas": "tom"}
+TEAM_ALIASES = {"wsh": "was", "jac": "jax", "la": "lar"} # ESPN abbreviations that differ from Sleeper's.
+INJURY_TAGS = ["sspd", "ir", "q", "o", "d"] # ESPN appends these to the team, e.g. "IndQ" or "NYGO".
+FUZZY_CANDIDATES = 20 # How many n-gram matches get a full similarity check.
+FUZZY_THRESHOLD = 0.85
+
+class StatsUnavailableError(Exception):
+	pass
+
+class PlayerRegistry:
+	# Keeps only the fields the analysis uses, in parallel lists indexed by row.
+	FIELDS = ("ids", "positions", "full_names", "last_names", "first_names", "teams", "actives")
+	__slots__ = FIELDS + ("rows", "fingerprint")
+
+	def __init__(self, players=()):
+		self.ids = list()
+		self.positions = list()
+		self.full_names = list() # Already normalized; empty for players (e.g. defenses) without a full name.
+		self.last_names = list()
+		self.first_names = list()
+		self.teams = list() # Lowercase team abbreviations; empty for free agents.
+		self.actives = list()
+		self.rows = dict() # Maps from player id to row.
+		self.fingerprint = "" # SHA-1 of the snapshot the registry was loaded from.
+
+		for player_id, player in players: # Any iterable of (player id, Sleeper player dict) pairs.
+			full_name = player.get('full_name') or ""
+			self.add(player_id, player.get('position') or "",
+				normalizePlayerName(full_name, warn=False) if full_name else "", player.get('last_name') or "",
+				player.get('first_name') or "", player.get('team') or "", bool(player.get('active')))
+
+	def add(self, player_id, position, full_name, last_name, first_name="", team="", active=False):
+		position = sys.intern(position.lower())
+		self.rows[player_id] = len(self.ids)
+		self.ids.append(player_id)
+		self.positions.append(position)
+		self.full_names.append(full_name)
+		self.last_names.append(last_name)
+		self.first_names.append(first_name)
+		self.teams.append(sys.intern(team.lower()))
+		self.actives.append(active)
+
+	def __contains__(self, player_id):
+		return player_id in self.rows
+
+	def __len__(self):
+		return len(self.ids)
+
+	def getDisplayName(self, player_id):
+		# Defenses are referred to by their team name (e.g. "Patriots"), which Sleeper stores as the last name.
+		row = self.rows[player_id]
+		return self.last_names[row] if self.positions[row] == 'def' else self.full_names[row]
 
 def fxn():
     warnings.warn("runtime", RuntimeWarning)
 
-def sortPlayers(d):
-	return d[1]['pts_ppr'] if 'pts_ppr' in d[1] else d[1]['pts_std']
+def getPointsKey(position):
+	return 'pts_ppr' if position.lower() != 'def' else 'pts_std'
 
-def fixJsonFile(initial_path="players.json"):
-	if not os.path.exists(initial_path):
-		with open(initial_path, "w+") as file:
-			response = requests.get("https://api.sleeper.app/v1/players/nfl")
-			file.write(response.text)
-
-	with open(initial_path) as json_file:
-		text = json_file.read()
+def iterPlayersJson(path, chunk_size=1 << 20):
+	# Streams the (player id, player) pairs out of the Sleeper players dump without ever holding the whole file in memory.
+	decoder = json.JSONDecoder()
+	whitespace = re.compile(r'[\s,]*')
+	key_separator = re.compile(r'\s*:\s*')
 
-		text = re.sub(r'(\w)\"\",', '\g<1>\",', text) # Remove double-quotes following heights
-		text = re.sub(r': (\w+)}?,', ': \"\g<1>\",', text) # E.g. replace False with "False"
-		text = re.sub(r'(\w+)\"(\w+)', "\g<1>'\g<2>", text)
-		text = re.sub(r': \"(\w+)\" ', ": \"\g<1>' ", text)
+	with open(path, encoding="utf-8") as json_file:
+		buffer = json_file.read(chunk_size)
+		pos = whitespace.match(buffer).end()
+		if buffer[pos:pos+1] != "{":
+			raise ValueError("{} doesn't contain a JSON object".format(path))
+		pos += 1
+		eof = False
 
-		text = text.replace("\"None\"", "\"\"")
-		text = text.replace(" None,", " \"\",")
-		text = text.replace(" None}", " \"\"}")
+		while True:
+			pos = whitespace.match(buffer, pos).end()
+			if buffer[pos:pos+1] == "}":
+				return
 
-		text = re.sub(r'(\"rotowire_id\": \"[0-9]*\")', "\g<1>}", text) # Add a matching } for each player.
-		text = re.sub(r'(\", \"([0-9]+)\": {\"college)', "\"}, \"\g<1>\": {\"college)}", text)
+			try:
+				if pos >= len(buffer): raise ValueError("need more data")
+				player_id, end = decoder.raw_decode(buffer, pos)
+				separator = key_separator.match(buffer, end)
+				if not separator or separator.end() >= len(buffer): raise ValueError("need more data")
+				player, end = decoder.raw_decode(buffer, separator.end())
+			except ValueError:
+				# The next entry runs past the end of the buffer, so pull in another chunk and retry it.
+				if eof:
+					raise ValueError("{} is truncated or malformed near character {}".format(path, pos))
+				more = json_file.read(chunk_size)
+				eof = (more == "")
+				buffer = buffer[pos:] + more
+				pos = 0
+				continue
 
-		text = text.replace(", \"\",", ", ")
-		text = text.replace("{\"college)}\": ", "")
-		text = text.replace("}}}", "}}")
+			yield player_id, player
+			pos = end
+
+def iterPlayers(path):
+	count = 0
+	try:
+		for player_id, player in iterPlayersJson(path):
+			count += 1
+			yield player_id, player
+	except ValueError:
+		if count > 0: raise
+		# Older dumps were saved as a Python dict repr rather than JSON.
+		with open(path, encoding="utf-8") as players_file:
+			players_dict = ast.literal_eval(players_file.read())
+		yield from players_dict.items()
+
+def writePlayersSnapshot(registry, path=PLAYERS_SNAPSHOT_PATH):
+	# Layout: magic, version and player count, then one NUL-separated UTF-8 blob per registry field.
+	fields = [getattr(registry, field) for field in PlayerRegistry.FIELDS[:-1]] + [["1" if active else "" for active in registry.actives]]
+	blobs = [b"\0".join(value.encode("utf-8") for value in field) for field in fields]
+
+	tmp_path = "{}.{}.tmp".format(path, os.getpid())
+	with open(tmp_path, "wb") as snapshot_file:
+		snapshot_file.write(struct.pack("<8sHI", PLAYERS_SNAPSHOT_MAGIC, PLAYERS_SNAPSHOT_VERSION, len(registry)))
+		for blob in blobs:
+			snapshot_file.write(struct.pack("<I", len(blob)))
+			snapshot_file.write(blob)
+	os.replace(tmp_path, path)
+
+def readPlayersSnapshot(path=PLAYERS_SNAPSHOT_PATH):
+	with open(path, "rb") as snapshot_file:
+		data = snapshot_file.read()
+	countEvent("bytes_read", len(data))
+
+	magic, version, count = struct.unpack_from("<8sHI", data)
+	if magic != PLAYERS_SNAPSHOT_MAGIC or version != PLAYERS_SNAPSHOT_VERSION:
+		raise ValueError("{} is not a version {} players snapshot".format(path, PLAYERS_SNAPSHOT_VERSION))
+
+	fields = list()
+	offset = struct.calcsize("<8sHI")
+	for _ in PlayerRegistry.FIELDS:
+		(length,) = struct.unpack_from("<I", data, offset)
+		offset += 4
+		values = data[offset:offset+length].decode("utf-8").split("\0") if count else list()
+		if len(values) != count:
+			raise ValueError("{} is corrupted".format(path))
+		fields.append(values)
+		offset += length
+
+	registry = PlayerRegistry()
+	registry.fingerprint = hashlib.sha1(data).hexdigest()
+	registry.ids, registry.full_names, registry.last_names, registry.first_names = fields[0], fields[2], fields[3], fields[4]
+	registry.positions = [sys.intern(position) for position in fields[1]]
+	registry.teams = [sys.intern(team) for team in fields[5]]
+	registry.actives = [active == "1" for active in fields[6]]
+	registry.rows = {player_id: row for row, player_id in enumerate(registry.ids)}
+
+	return registry
 
-		with open("players_fixed.json", "w+") as new_file:
-			new_file.write(text)
+def fixJsonFile(initial_path="players.json"):
+	if not os.path.exists(initial_path):
+		if OFFLINE:
+			raise StatsUnavailableError("{} is missing and offline mode is on".format(initial_path))
+
+		response = requests.get("{}/players/nfl".format(SLEEPER_API_URL), stream=True)
+		response.raise_for_status()
+		with open(initial_path + ".tmp", "wb") as file:
+			for chunk in response.iter_content(chunk_size=1 << 20):
+				file.write(chunk)
+		os.replace(initial_path + ".tmp", initial_path)
+
+	writePlayersSnapshot(PlayerRegistry(iterPlayers(initial_path)))
+	return readPlayersSnapshot()
+
+def getScoringProfiles():
+	# The built-in profiles plus any defined in SCORING_PROFILES_PATH, which take precedence.
+	profiles = dict(SCORING_PROFILES)
+	if os.path.exists(SCORING_PROFILES_PATH):
+		with open(SCORING_PROFILES_PATH) as profiles_file:
+			profiles.update(json.load(profiles_file))
+	return profiles
+
+def getScoringProfile(name, profiles=None):
+	# Flattens a profile's "extends" chain into {"stats": ..., "positions": ..., "points_allowed": ...}.
+	profiles = profiles or getScoringProfiles()
+	if name not in profiles:
+		raise ValueError("unknown scoring profile {} (choose from {})".format(name, ", ".join(sorted(profiles))))
+
+	definition = profiles[name]
+	profile = getScoringProfile(definition['extends'], profiles) if 'extends' in definition else {'stats': dict(), 'positions': dict(), 'points_allowed': None}
+	profile['stats'].update(definition.get('stats', dict()))
+	for position, weights in definition.get('positions', dict()).items():
+		profile['positions'].setdefault(position.lower(), dict()).update(weights)
+	if 'points_allowed' in definition:
+		profile['points_allowed'] = definition['points_allowed']
+
+	return profile
+
+def getProfileHash(name):
+	return hashlib.sha1(json.dumps(getScoringProfile(name), sort_keys=True).encode("utf-8")).hexdigest()
+
+def getStatMatrix(stats, stat_names):
+	# The week's scoring players as a players x stats array (NaN for stats a player has no entry for), along with their
+	# ids and position indexes into ALL_POSITIONS_LIST. As before, a player counts only if Sleeper scored them.
+	players = getPlayerRegistry()
+	position_codes = {position: code for code, position in enumerate(ALL_POSITIONS_LIST)}
+	ids, codes, rows = list(), list(), list()
+
+	for player_id, player_stats in stats.items():
+		row = players.rows.get(player_id)
+		if row is None: continue
+
+		position = players.positions[row]
+		if position in position_codes and getPointsKey(position) in player_stats:
+			ids.append(player_id)
+			codes.append(position_codes[position])
+			rows.append([player_stats.get(stat, np.nan) for stat in stat_names])
+
+	return ids, np.array(codes, dtype=np.int64), np.array(rows, dtype=float).reshape(len(rows), len(stat_names))
+
+def getStatNames(profile_names):
+	stat_names = {"pts_allow"}
+	for name in profile_names:
+		profile = getScoringProfile(name)
+		stat_names.update(profile['stats'])
+		for weights in profile['positions'].values():
+			stat_names.update(weights)
+	return sorted(stat_names)
+
+def scoreStatMatrix(matrix, codes, profile_names, stat_names):
+	# Scores every row of a players x stats array under every profile at once. Returns a profiles x players array.
+	weights = np.zeros((len(profile_names), len(ALL_POSITIONS_LIST), len(stat_names)))
+	columns = {stat: column for column, stat in enumerate(stat_names)}
+	for i, name in enumerate(profile_names):
+		profile = getScoringProfile(name)
+		for code, position in enumerate(ALL_POSITIONS_LIST):
+			for stat, weight in dict(profile['stats'], **profile['positions'].get(position, dict())).items():
+				weights[i, code, columns[stat]] = weight
+
+	points = np.einsum("rs,prs->pr", np.nan_to_num(matrix), weights[:, codes, :])
+
+	# Points-allowed tiers for defenses that have a points-allowed entry.
+	points_allowed = matrix[:, columns["pts_allow"]]
+	has_tier = (codes == ALL_POSITIONS_LIST.index("def")) & ~np.isnan(points_allowed)
+	for i, name in enumerate(profile_names):
+		tiers = getScoringProfile(name)['points_allowed']
+		if tiers and has_tier.any():
+			bounds = [bound for bound, _ in tiers if bound is not None]
+			tier_points = np.array([tier for _, tier in tiers] + [0] * (len(bounds) + 1 - len(tiers)), dtype=float)
+			tier = np.searchsorted(bounds, points_allowed[has_tier], side="left")
+			points[i, has_tier] += tier_points[tier]
+
+	return points
+
+def scoreWeeks(weeks_stats, profile_names, season=SEASON):
+	# Scores any number of weeks under any number of profiles with one stacked players x stats array, and caches a
+	# WeekPartition for every (week, profile). The stats are only read, never refetched.
+	stat_names = getStatNames(profile_names)
+	weeks = list()
+	for week, stats in weeks_stats:
+		ids, codes, matrix = getStatMatrix(stats, stat_names)
+		weeks.append((week, stats, ids, codes, matrix))
+	if not weeks:
+		return
+
+	points = scoreStatMatrix(np.vstack([matrix for *_, matrix in weeks]), np.concatenate([codes for *_, codes, _ in weeks]),
+		profile_names, stat_names)
+
+	start = 0
+	for week, stats, ids, codes, _ in weeks:
+		for i, name in enumerate(profile_names):
+			WEEK_PARTITIONS[(season, week, name)] = WeekPartition(week, stats, season, name, (ids, codes, points[i, start:start+len(ids)]))
+		start += len(ids)
+
+class WeekPartition:
+	# A week's players bucketed by position, each bucket sorted from most to fewest points under a scoring profile.
+	__slots__ = ("week", "season", "profile", "stats", "ids", "points", "lookup")
+
+	def __init__(self, week, stats, season=SEASON, profile=None, scores=None):
+		# scores is (ids, position indexes, points) if the week's already been scored, e.g. by scoreWeeks().
+		profile = profile or SCORING_PROFILE
+		if scores is None:
+			stat_names = getStatNames([profile])
+			ids, codes, matrix = getStatMatrix(stats, stat_names)
+			scores = (ids, codes, scoreStatMatrix(matrix, codes, [profile], stat_names)[0])
+		ids, codes, points = scores
+
+		self.week = week
+		self.season = season
+		self.profile = profile
+		self.stats = stats
+		self.ids = dict() # Maps from position to player ids, best performance first.
+		self.points = dict() # Maps from position to a descending array of points, parallel to ids.
+		self.lookup = dict() # Maps from position to player id to points; filled on first use.
+
+		for code, position in enumerate(ALL_POSITIONS_LIST):
+			rows = np.flatnonzero(codes == code)
+			rows = rows[np.argsort(-points[rows], kind="stable")] # Ties keep the stats' order.
+			self.ids[position] = [ids[row] for row in rows.tolist()]
+			self.points[position] = points[rows]
+
+	def getSortedPoints(self, position):
+		# Ascending order, as used for percentiles.
+		return self.points[position.lower()][::-1]
+
+	def getPoints(self, player_id, position):
+		# None if the player didn't score at the position.
+		position = position.lower()
+		if position not in self.lookup:
+			self.lookup[position] = dict(zip(self.ids[position], self.points[position].tolist()))
+		return self.lookup[position].get(player_id)
+
+def getWeekPartition(week, stats=None, season=SEASON, profile=None):
+	profile = profile or SCORING_PROFILE
+	partition = WEEK_PARTITIONS.get((season, week, profile))
+	if partition is None or (stats is not None and partition.stats is not stats):
+		partition = WeekPartition(week, stats if stats is not None else getWeekStats(week, season), season, profile)
+		WEEK_PARTITIONS[(season, week, profile)] = partition
+
+	return partition
+
+class SeasonPoints:
+	# Every player's points across a season, as one dense player × week array per position with NaN for weeks a player
+	# didn't play. Totals, per-game averages and top-k lists over any range of weeks all come from slices of it.
+	def __init__(self, season=SEASON):
+		self.season = season
+		self.weeks = list() # Sorted; parallel to the arrays' columns.
+		self.ids = {position: list() for position in ALL_POSITIONS_LIST} # Parallel to the arrays' rows.
+		self.rows = {position: dict() for position in ALL_POSITIONS_LIST} # Maps from player id to row.
+		self.points = {position: np.empty((0, 0)) for position in ALL_POSITIONS_LIST}
+
+	def addWeek(self, partition):
+		# Adds a week's column, or overwrites it if the week's already there.
+		if partition.week not in self.weeks:
+			column = np.searchsorted(self.weeks, partition.week)
+			self.weeks.insert(column, partition.week)
+			for position in ALL_POSITIONS_LIST:
+				self.points[position] = np.insert(self.points[position], column, np.nan, axis=1)
+		column = self.weeks.index(partition.week)
+
+		for position in ALL_POSITIONS_LIST:
+			ids, rows = self.ids[position], self.rows[position]
+			week_rows = [rows.setdefault(player_id, len(rows)) for player_id in partition.ids[position]]
+			ids.extend(list(rows)[len(ids):])
+
+			points = self.points[position]
+			if len(ids) > points.shape[0]:
+				points = np.vstack([points, np.full((len(ids) - points.shape[0], len(self.weeks)), np.nan)])
+			points[:, column] = np.nan
+			points[week_rows, column] = partition.points[position]
+			self.points[position] = points
+
+	def getColumns(self, weeks=None):
+		if weeks is None:
+			return slice(None)
+		return [column for column, week in enumerate(self.weeks) if week in set(weeks)]
+
+	def getTotals(self, position, weeks=None):
+		# Returns each player's total points and games played over the given weeks.
+		block = self.points[position][:, self.getColumns(weeks)]
+		return np.nansum(block, axis=1), np.count_nonzero(~np.isnan(block), axis=1)
+
+	def getAverages(self, position, weeks=None, min_games=PER_GAME_MIN_GAMES):
+		# Per-game averages, NaN for players short of the game minimum.
+		totals, games = self.getTotals(position, weeks)
+		with np.errstate(invalid="ignore", divide="ignore"):
+			return np.where(games >= max(min_games, 1), totals / games, np.nan), games
+
+	def getTop(self, position, k=CUMULATIVE_TOP_N, weeks=None, per_game=False):
+		# Returns the best k (player id, points, games) for the position, selecting them before sorting only those k.
+		values, games = self.getAverages(position, weeks) if per_game else self.getTotals(position, weeks)
+		if not per_game:
+			values = np.where(games > 0, values, np.nan)
+
+		valid = np.flatnonzero(~np.isnan(values))
+		if len(valid) > k:
+			valid = valid[np.argpartition(-values[valid], k - 1)[:k]]
+		top = valid[np.argsort(-values[valid], kind="stable")]
+
+		return [(self.ids[position][row], float(values[row]), int(games[row])) for row in top]
+
+def getStatsUrl(week, season=SEASON):
+	return "{}/stats/nfl/regular/{}/{}".format(SLEEPER_API_URL, season, week)
+
+def getStatsCachePath(week, season=SEASON):
+	return os.path.join(STATS_CACHE_DIR, str(season), "week{}.json.gz".format(week))
+
+def isWeekFinal(week, season=SEASON, day=None):
+	# Whether a week's stats had stopped changing as of the given day (default: today). The games are over by Monday
+	# night, but the league's stat corrections keep coming in until the middle of the following week.
+	return (day or date.today()) > getSeasonStartDate(season) + timedelta(days=(week - 1) * 7 + STATS_FINAL_DAYS)
+
+def readCachedStats(week, season=SEASON):
+	path = getStatsCachePath(week, season)
+	if not os.path.exists(path):
+		return None
+
+	# Each cache file is a gzipped header line followed by the raw stats payload.
+	try:
+		with gzip.open(path, "rb") as cache_file:
+			header = json.loads(cache_file.readline())
+			payload = cache_file.read()
+	except (OSError, EOFError, ValueError):
+		return None
+
+	countEvent("bytes_read", len(payload))
+	if header.get('version') != STATS_CACHE_VERSION or header.get('season') != season or header.get('week') != week:
+		return None
+	if header.get('sha1') != hashlib.sha1(payload).hexdigest():
+		print(getStringInColor(Fore.YELLOW, "Warning: Corrupted stats cache for week {} of {}...ignoring it.".format(week, season)))
+		return None
+	# Finality goes by when the stats were fetched, so entries fetched before a week's corrections were in still expire.
+	fetched = header.get('fetched', 0)
+	if not OFFLINE and not isWeekFinal(week, season, date.fromtimestamp(fetched)) and time.time() - fetched > STATS_CACHE_TTL:
+		return None
+
+	WEEK_STATS_HASHES[(season, week)] = header['sha1']
+	return json.loads(payload)
+
+def writeCachedStats(week, stats, season=SEASON):
+	path = getStatsCachePath(week, season)
+	os.makedirs(os.path.dirname(path), exist_ok=True)
+
+	payload = json.dumps(stats, separators=(",", ":")).encode("utf-8")
+	header = {'version': STATS_CACHE_VERSION, 'season': season, 'week': week, 'fetched': time.time(),
+		'sha1': hashlib.sha1(payload).hexdigest()}
+
+	# Write to a temporary file first so that an interrupted run never leaves a half-written cache entry.
+	tmp_path = "{}.{}.tmp".format(path, os.getpid())
+	with gzip.open(tmp_path, "wb") as cache_file:
+		cache_file.write(json.dumps(header).encode("utf-8") + b"\n")
+		cache_file.write(payload)
+	os.replace(tmp_path, path)
+	WEEK_STATS_HASHES[(season, week)] = header['sha1']
+
+def getStatsHash(week, stats, season=SEASON):
+	if WEEK_STATS_MEMO.get((season, week)) is stats and (season, week) in WEEK_STATS_HASHES:
+		return WEEK_STATS_HASHES[(season, week)]
+	return hashlib.sha1(json.dumps(stats, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+def getHttpSession():
+	global HTTP_SESSION
+
+	with HTTP_SESSION_LOCK:
+		if HTTP_SESSION is None:
+			# Retries back off exponentially (0.5s, 1s, 2s, ...) on connection errors, rate limiting and server errors.
+			retry = Retry(total=HTTP_RETRIES, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["GET"])
+			adapter = HTTPAdapter(pool_connections=2, pool_maxsize=PREFETCH_WORKERS, max_retries=retry)
+
+			session = requests.Session()
+			session.mount("https://", adapter)
+			session.mount("http://", adapter)
+			HTTP_SESSION = session # Only published once it's fully set up.
+
+	return HTTP_SESSION
+
+def prefetchWeekStats(weeks, season=SEASON, max_workers=PREFETCH_WORKERS):
+	# Starts fetching every week concurrently right away, and returns an iterator of (week, stats) in week order so the
+	# first week can be analyzed as soon as it arrives while the rest keep downloading.
+	weeks = list(weeks)
+	executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(weeks))))
+	futures = [(week, executor.submit(getWeekStats, week, season)) for week in weeks]
+	executor.shutdown(wait=False)
+
+	return iterPrefetchedStats(futures, season)
+
+def iterPrefetchedStats(futures, season=SEASON):
+	# Stats are None for weeks that couldn't be fetched.
+	try:
+		for week, future in futures:
+			try:
+				yield week, future.result()
+			except (StatsUnavailableError, requests.RequestException) as e:
+				print(getStringInColor(Fore.YELLOW, "\nWarning: Couldn't get stats for week {} of {} ({})...skipping it.".format(week, season, e)))
+				yield week, None
+	finally:
+		for _, future in futures:
+			future.cancel()
+
+def getWeekStats(week, season=SEASON):
+	if (season, week) in WEEK_STATS_MEMO:
+		return WEEK_STATS_MEMO[(season, week)]
+
+	stats = readCachedStats(week, season)
+	countEvent("stats_cache_hits" if stats is not None else "stats_cache_misses")
+	if stats is None:
+		if OFFLINE:
+			raise StatsUnavailableError("No cached stats for week {} of {} and offline mode is on".format(week, season))
+
+		response = getHttpSession().get(getStatsUrl(week, season), timeout=30)
+		response.raise_for_status()
+		countEvent("http_calls")
+		countEvent("bytes_downloaded", len(response.content))
+		stats = response.json()
+		writeCachedStats(week, stats, season)
+
+	WEEK_STATS_MEMO[(season, week)] = stats
+	return stats
+
+def serveStats(port=8000):
+	# A stand-in for the Sleeper API that only answers from the local cache, e.g. for running without network access:
+	#   python fantasy.py serve 8000
+	#   SLEEPER_API_URL=http://localhost:8000/v1 python fantasy.py
+	global OFFLINE
+	OFFLINE = True
+
+	class StatsHandler(http.server.BaseHTTPRequestHandler):
+		def do_GET(self):
+			stats_match = re.fullmatch(r'/v1/stats/nfl/regular/([0-9]+)/([0-9]+)/?', self.path)
+			if stats_match:
+				try:
+					body = json.dumps(getWeekStats(int(stats_match.group(2)), int(stats_match.group(1)))).encode("utf-8")
+				except StatsUnavailableError:
+					body = None
+			elif self.path.rstrip("/") == "/v1/players/nfl" and os.path.exists("players.json"):
+				with open("players.json", "rb") as players_file:
+					body = players_file.read()
+			else:
+				body = None
+
+			if body is None:
+				self.send_error(404)
+				return
+
+			self.send_response(200)
+			self.send_header("Content-Type", "application/json")
+			self.send_header("Content-Length", str(len(body)))
+			self.end_headers()
+			self.wfile.write(body)
+
+	server = http.server.ThreadingHTTPServer(("localhost", port), StatsHandler)
+	print("Serving cached Sleeper stats at http://localhost:{}/v1 (Ctrl-C to stop)".format(port))
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.server_close()
+
+def getPlayerRegistry():
+	global PLAYER_REGISTRY
+
+	if PLAYER_REGISTRY is None:
+		# Rebuild the snapshot whenever it's missing, from an older version, or older than the raw players dump.
+		stale = os.path.exists("players.json") and (not os.path.exists(PLAYERS_SNAPSHOT_PATH) or
+			os.path.getmtime("players.json") > os.path.getmtime(PLAYERS_SNAPSHOT_PATH))
+		try:
+			if stale: raise ValueError("stale players snapshot")
+			PLAYER_REGISTRY = readPlayersSnapshot()
+		except (OSError, ValueError, struct.error):
+			PLAYER_REGISTRY = fixJsonFile()
+
+	return PLAYER_REGISTRY
+
+def getNameKey(name):
+	# "D.J. Chark Jr." -> "dj chark", "Mitchell Trubisky" -> "mitch trubisky", "Patriots D/ST" -> "patriots"
+	tokens = re.sub(r"[.'’]", "", name.lower()).replace("-", " ").split()
+	tokens = [token for token in tokens if token not in ["d/st", "dst"]]
+	tokens = [token for token in tokens if token not in NAME_SUFFIXES] or tokens
+	if len(tokens) > 1:
+		tokens[0] = FIRST_NAME_ALIASES.get(tokens[0], tokens[0])
+
+	return " ".join(tokens)
+
+def getNgrams(key, n=3):
+	padded = "  {} ".format(key)
+	return {padded[i:i+n] for i in range(len(padded) - n + 1)}
+
+class NameIndex:
+	# Resolves names from rankings and love/hate files to player ids. Exact lookups go through normalized name keys; a
+	# per-position trigram index narrows fuzzy lookups down to a few candidates before comparing them in full.
+	def __init__(self, registry):
+		self.registry = registry
+		self.keys = dict() # Maps from name key to the rows of every player with it.
+		self.ngrams = dict() # Maps from position to trigram to name keys containing it.
+		self.fuzzy_memo = dict() # Maps from (name key, position) to the fuzzy match's key, or None.
+		self.teams = set(registry.teams) - {""}
+
+		seen = set()
+		for row, position in enumerate(registry.positions):
+			names = [registry.full_names[row]]
+			if position == 'def':
+				# Defenses go by their nickname ("Patriots"), their city ("New England") or their abbreviation ("NE").
+				names = [registry.last_names[row], registry.first_names[row], registry.ids[row], registry.teams[row],
+					"{} {}".format(registry.first_names[row], registry.last_names[row])]
+
+			for key in set(getNameKey(name) for name in names if name):
+				# Trigrams go in once per (key, position), so a name shared across positions is still findable under each.
+				for index_position in [position, ""]:
+					if (key, index_position) not in seen:
+						seen.add((key, index_position))
+						for ngram in getNgrams(key):
+							self.ngrams.setdefault(index_position, dict()).setdefault(ngram, list()).append(key)
+				self.keys.setdefault(key, list()).append(row)
+
+	def getTeam(self, team):
+		# Lowercase Sleeper abbreviation for a rankings file's team. An injury tag is only dropped when what's left is a
+		# known team, since e.g. "NO" is a team and not "N" plus a tag.
+		team = (team or "").lower()
+		if team not in self.teams and team not in TEAM_ALIASES:
+			for tag in INJURY_TAGS:
+				if team.endswith(tag) and (team[:-len(tag)] in self.teams or team[:-len(tag)] in TEAM_ALIASES):
+					team = team[:-len(tag)]
+					break
+		return TEAM_ALIASES.get(team, team)
+
+	def getFuzzyKey(self, key, position=""):
+		if (key, position) not in self.fuzzy_memo:
+			overlaps = Counter()
+			position_ngrams = self.ngrams.get(position, dict())
+			for ngram in getNgrams(key):
+				overlaps.update(position_ngrams.get(ngram, ()))
+
+			best_key, best_ratio = None, FUZZY_THRESHOLD
+			for candidate, _ in overlaps.most_common(FUZZY_CANDIDATES):
+				ratio = difflib.SequenceMatcher(None, key, candidate).ratio()
+				if ratio >= best_ratio:
+					best_key, best_ratio = candidate, ratio
+			self.fuzzy_memo[(key, position)] = best_key
+
+		return self.fuzzy_memo[(key, position)]
+
+	def resolve(self, name, position=None, team=None, stats=None, unique=False):
+		# When several players share a name, prefer the one on the given team, then one who has stats that week, then an
+		# active one. Returns None if there's no close enough match, or with unique=True, if the choice would come down to
+		# anything past the team.
+		position = (position or "").lower()
+		key = getNameKey(name)
+		rows = [row for row in self.keys.get(key, ()) if not position or self.registry.positions[row] == position]
+		if not rows:
+			fuzzy_key = self.getFuzzyKey(key, position)
+			if fuzzy_key is None:
+				return None
+			rows = [row for row in self.keys[fuzzy_key] if not position or self.registry.positions[row] == position]
+
+		if len(rows) > 1:
+			team = self.getTeam(team)
+			if unique and (not team or sum(self.registry.teams[row] == team for row in rows) != 1):
+				return None
+			rows = sorted(rows, key=lambda row: (bool(team) and self.registry.teams[row] != team, stats is not None and self.registry.ids[row] not in stats,
+				not self.registry.actives[row], row))
+
+		return self.registry.ids[rows[0]]
+
+def getNameIndex():
+	global NAME_INDEX
+
+	if NAME_INDEX is None or NAME_INDEX.registry is not getPlayerRegistry():
+		NAME_INDEX = NameIndex(getPlayerRegistry())
+
+	return NAME_INDEX
+
+def resolveRankings(rankings_list, teams, position, stats=None, ids=None):
+	# Players that can't be resolved keep their name, which never matches a player id. ids can hold ids resolved ahead of
+	# time (e.g. by the rankings store), with None for the players that still need resolving.
+	index = getNameIndex()
+	ids = ids or [None] * len(rankings_list)
+	return [player_id or index.resolve(name, position, team, stats) or name for (name, team, player_id) in zip(rankings_list, teams, ids)]
 
 def average(l):
 	return sum(l) / len(l)
 
-def getPositionResults(position, week, stats=None, top_n_to_print=0):
-	global PLAYER_ID_CACHE, POSITION_POINTS_DICT
-
-	if week < 0 or week > 17: return None
-
-	with open("players_fixed.json") as json_file:
-		players_dict = json.load(json_file)
-
-	if not stats:
-		response = requests.get("https://api.sleeper.app/v1/stats/nfl/regular/2019/{}".format(week))
-		stats = response.json()
-
-	stats_list = list()
-	position = position.lower()
-
-	if week not in POSITION_POINTS_DICT: POSITION_POINTS_DICT[week] = dict()
-	if position.upper() not in POSITION_POINTS_DICT[week]: POSITION_POINTS_DICT[week][position.upper()] = list()
-
-	for player_id in stats:
-
-		if player_id not in players_dict: continue
-
-		if 'full_name' in players_dict[player_id]:
-			players_dict[player_id]['full_name'] = normalizePlayerName(players_dict[player_id]['full_name'])
-			if players_dict[player_id]['full_name'] not in PLAYER_ID_CACHE:
-				PLAYER_ID_CACHE[players_dict[player_id]['full_name']] = player_id
-
-		if players_dict[player_id]['position'].lower() == position and ('pts_ppr' if position != 'def' else 'pts_std') in stats[player_id]:
-			stats_list.append((player_id, stats[player_id]))
-			POSITION_POINTS_DICT[week][position.upper()].append(stats[player_id]['pts_ppr' if position != 'def' else 'pts_std'])
-
-	stats_list = sorted(stats_list, key=sortPlayers, reverse=True)
-	stats_list_names = [players_dict[d[0]][('full_name' if position != 'def' else 'last_name')] for d in stats_list]
-
-	printRankings(top_n_to_print, stats_list_names)
-
-	return (stats_list, stats_list_names)
+def compareRankings(predicted, actual, k=TOP_K):
+	# Compares a predicted order of players against their actual order (both lists of player keys, best first).
+	# Keys are mapped to integers once, after which every metric is computed over NumPy rank arrays.
+	codes = dict()
+	for rank, key in enumerate(actual):
+		codes.setdefault(key, rank) # Keep the best rank if a key appears more than once.
+
+	predicted_codes = np.fromiter((codes.get(key, -1) for key in predicted), dtype=np.int64, count=len(predicted))
+	_, first_seen = np.unique(predicted_codes, return_index=True)
+	in_common = np.zeros(len(predicted), dtype=bool)
+	in_common[first_seen] = True
+	in_common &= (predicted_codes >= 0)
+
+	# Sum of |predicted rank - actual rank| using each player's rank in the full lists.
+	predicted_positions = np.flatnonzero(in_common)
+	common_codes = predicted_codes[in_common]
+	difference_sum = int(np.abs(predicted_positions - common_codes).sum())
+
+	# Ranks among only the players the two lists have in common.
+	n = len(common_codes)
+	predicted_rank = np.arange(n)
+	actual_rank = np.empty(n, dtype=np.int64)
+	actual_rank[np.argsort(common_codes, kind="stable")] = predicted_rank
+	errors = np.abs(predicted_rank - actual_rank)
+
+	metrics = {
+		'n': n,
+		'players': [predicted[i] for i in predicted_positions.tolist()], # In predicted order, parallel to errors.
+		'errors': errors,
+		'predicted_positions': predicted_positions, # Each of those players' rank in the full predicted list...
+		'actual_positions': common_codes, # ...and in the full actual list, which is all the significance tests need.
+		'avg_difference': difference_sum / (n * n) if n else float("nan"),
+		'coefficient': float("nan"),
+		'spearman': float("nan"),
+		'precision_at_k': float("nan"),
+		'ndcg_at_k': float("nan"),
+	}
+	if n < 2:
+		return metrics
+
+	metrics['coefficient'] = kendalltau(predicted_rank, actual_rank)[0]
+	metrics['spearman'] = 1 - (6 * float(np.square(errors).sum())) / (n * (n * n - 1)) # Exact since there are no ties.
+
+	k = min(k, n)
+	metrics['precision_at_k'] = int(np.count_nonzero(actual_rank[:k] < k)) / k
+
+	# Graded relevance: the best actual performer is worth n, the worst is worth 1.
+	discounts = 1 / np.log2(np.arange(2, k + 2))
+	dcg = float(((n - actual_rank[:k]) * discounts).sum())
+	ideal_dcg = float(((n - predicted_rank[:k]) * discounts).sum())
+	metrics['ndcg_at_k'] = dcg / ideal_dcg
+
+	return metrics
+
+def rankWithinColumns(values, valid):
+	# 0-based rank of each value within its column, ignoring invalid cells (which get ranks past the valid ones).
+	order = np.argsort(np.where(valid, values, np.inf), axis=0, kind="stable")
+	ranks = np.empty(order.shape, dtype=np.int64)
+	np.put_along_axis(ranks, order, np.broadcast_to(np.arange(order.shape[0])[:, None], order.shape), axis=0)
+	return ranks
+
+def compareExpertRankings(predicted, ranks, actual, experts, k=TOP_K):
+	# Like compareRankings, but for a players x experts matrix of ranks parallel to predicted (NaN where an expert didn't
+	# rank a player). Every expert is scored at once with column-wise NumPy operations, each only over the players they
+	# ranked. Returns one array per metric with an entry per expert.
+	codes = dict()
+	for rank, key in enumerate(actual):
+		codes.setdefault(key, rank)
+
+	predicted_codes = np.fromiter((codes.get(key, -1) for key in predicted), dtype=np.int64, count=len(predicted))
+	_, first_seen = np.unique(predicted_codes, return_index=True)
+	in_common = np.zeros(len(predicted), dtype=bool)
+	in_common[first_seen] = True
+	in_common &= (predicted_codes >= 0)
+
+	ranks = np.asarray(ranks, dtype=float)
+	ranked = ~np.isnan(ranks)
+
+	# Each expert's ordering of the whole rankings file, then restricted to the players in common.
+	positions = rankWithinColumns(ranks, ranked)[in_common]
+	valid = ranked[in_common]
+	actual_codes = np.broadcast_to(predicted_codes[in_common][:, None], valid.shape)
+	n = valid.sum(axis=0)
+
+	difference_sum = np.where(valid, np.abs(positions - actual_codes), 0).sum(axis=0)
+	predicted_rank = rankWithinColumns(positions, valid)
+	actual_rank = rankWithinColumns(actual_codes, valid)
+	errors = np.where(valid, np.abs(predicted_rank - actual_rank), -1) # -1 where the expert didn't rank the player.
+
+	with np.errstate(divide="ignore", invalid="ignore"):
+		avg_difference = np.where(n > 0, difference_sum / (n * n), np.nan)
+		spearman = np.where(n > 1, 1 - (6 * np.square(np.where(valid, errors, 0)).sum(axis=0)) / (n * (n * n - 1)), np.nan)
+
+		# Kendall's tau from every pair's concordance. Ranks are strict (ties keep file order), so tau-a equals tau-b.
+		both_valid = valid[:, None, :] & valid[None, :, :]
+		concordance = (np.sign(predicted_rank[:, None, :] - predicted_rank[None, :, :]).astype(np.int8) *
+			np.sign(actual_rank[:, None, :] - actual_rank[None, :, :]).astype(np.int8))
+		coefficient = np.where(n > 1, np.where(both_valid, concordance, 0).sum(axis=(0, 1)) / (n * (n - 1)), np.nan)
+
+		top_k = np.minimum(k, n)
+		hits = (valid & (predicted_rank < top_k) & (actual_rank < top_k)).sum(axis=0)
+		precision_at_k = np.where(n > 1, hits / top_k, np.nan)
+
+		cutoffs = np.arange(k)[:, None]
+		ideal_dcg = np.where(cutoffs < top_k, (n - cutoffs) / np.log2(cutoffs + 2), 0).sum(axis=0)
+		dcg = np.where(valid & (predicted_rank < top_k), (n - actual_rank) / np.log2(predicted_rank + 2), 0).sum(axis=0)
+		ndcg_at_k = np.where(n > 1, dcg / ideal_dcg, np.nan)
+
+	return {
+		'experts': list(experts),
+		'n': n,
+		'players': [predicted[i] for i in np.flatnonzero(in_common).tolist()], # Rows of errors.
+		'errors': errors,
+		'avg_difference': avg_difference,
+		'coefficient': coefficient,
+		'spearman': spearman,
+		'precision_at_k': precision_at_k,
+		'ndcg_at_k': ndcg_at_k,
+	}
+
+def compareShuffledRankings(predicted_positions, actual_positions, k=TOP_K):
+	# compareRankings() for many shuffles of one week at once. actual_positions is shuffles x n, each row a permutation of
+	# the matched players' actual positions against the fixed predicted_positions. Returns an array per metric with an
+	# entry per shuffle.
+	n = actual_positions.shape[1]
+	predicted_rank = np.arange(n)
+	actual_rank = np.argsort(np.argsort(actual_positions, axis=1), axis=1)
+	errors = np.abs(predicted_rank - actual_rank)
+
+	# Predicted ranks are 0..n-1, so a pair i < j is concordant exactly when actual rank i < actual rank j. Comparing
+	# small ints over the upper triangle is much cheaper than multiplying full sign matrices.
+	small_rank = actual_rank.astype(np.int16)
+	concordant = np.count_nonzero((small_rank[:, :, None] < small_rank[:, None, :]) & np.triu(np.ones((n, n), dtype=bool), 1), axis=(1, 2))
+
+	k = min(k, n)
+	discounts = 1 / np.log2(np.arange(2, k + 2))
+	ideal_dcg = float(((n - predicted_rank[:k]) * discounts).sum())
+
+	return {
+		'avg_difference': np.abs(predicted_positions - actual_positions).sum(axis=1) / (n * n),
+		'coefficient': (4 * concordant) / (n * (n - 1)) - 1,
+		'spearman': 1 - (6 * np.square(errors).sum(axis=1)) / (n * (n * n - 1)),
+		'precision_at_k': np.count_nonzero(actual_rank[:, :k] < k, axis=1) / k,
+		'ndcg_at_k': ((n - actual_rank[:, :k]) * discounts).sum(axis=1) / ideal_dcg,
+	}
+
+def getConfidenceInterval(samples, confidence=CONFIDENCE):
+	low, high = np.nanpercentile(samples, [50 * (1 - confidence), 50 * (1 + confidence)])
+	return float(low), float(high)
+
+def getPermutationPValue(observed, null, higher_is_better=True):
+	# One-sided: the chance of doing at least this well by luck alone. The +1s count the observed result as a draw.
+	null = null if higher_is_better else -null
+	observed = observed if higher_is_better else -observed
+	return float((1 + np.count_nonzero(null >= observed - 1e-12)) / (len(null) + 1))
+
+def getRankingsSignificance(task):
+	# Runs in a worker process: tests one position's season-average metrics against random orderings of each week's
+	# matched players (permutation test) and puts a bootstrap confidence interval on them by resampling weeks.
+	weeks_positions, resamples, seed = task
+	rng = np.random.default_rng(seed)
+	weeks_positions = [(predicted, actual) for (predicted, actual) in weeks_positions if len(actual) >= 2]
+	if not weeks_positions:
+		return dict()
+
+	observed = {metric: list() for metric in RANKING_METRICS_LIST}
+	null = {metric: np.zeros(resamples) for metric in RANKING_METRICS_LIST}
+	for predicted, actual in weeks_positions:
+		for metric, value in compareShuffledRankings(predicted, actual[None, :]).items():
+			observed[metric].append(float(value[0]))
+		for start in range(0, resamples, RESAMPLE_CHUNK):
+			shuffles = rng.permuted(np.tile(actual, (min(RESAMPLE_CHUNK, resamples - start), 1)), axis=1)
+			for metric, values in compareShuffledRankings(predicted, shuffles).items():
+				null[metric][start:start+len(values)] += values
+
+	weeks = len(weeks_positions)
+	draws = rng.integers(0, weeks, size=(resamples, weeks))
+	significance = dict()
+	for metric in RANKING_METRICS_LIST:
+		values = np.array(observed[metric])
+		ci_low, ci_high = getConfidenceInterval(values[draws].mean(axis=1))
+		significance[metric] = {'value': float(values.mean()), 'ci_low': ci_low, 'ci_high': ci_high,
+			'chance': float((null[metric] / weeks).mean()),
+			'p_value': getPermutationPValue(values.mean(), null[metric] / weeks, higher_is_better=(metric != "avg_difference"))}
+
+	return significance
+
+def getLoveHateSignificance(task):
+	# Runs in a worker process: tests a hit rate against picking players at random (each pick hits with its own
+	# position-week's chance) and puts a bootstrap confidence interval on it by resampling picks.
+	correct, chances, resamples, seed = task
+	rng = np.random.default_rng(seed)
+	if len(correct) == 0:
+		return None
+
+	null = (rng.random((resamples, len(chances))) < chances).mean(axis=1)
+	ci_low, ci_high = getConfidenceInterval(correct[rng.integers(0, len(correct), size=(resamples, len(correct)))].mean(axis=1))
+	return {'value': float(correct.mean()), 'ci_low': ci_low, 'ci_high': ci_high, 'chance': float(chances.mean()),
+		'p_value': getPermutationPValue(correct.mean(), null)}
 
 def printRankings(limit, l, reverseRank=False, parenMessage=""):
 	l = list(l)
@@ -104,21 +982,73 @@ def getStringInColor(color, s):
 	return "{}{}{}".format(color, s, Style.RESET_ALL)
 
 def getPercentile(l, n):
-	for i, val in enumerate(l):
-		if i == len(l) - 1: # Reached the end of the list, so this must be the last item.
-			return 100
-
-		if n >= val and n <= l[i+1]:
-			return (i * 100) / len(l)
-
-def normalizePlayerName(s):
+	# l must be sorted in ascending order. Binary search for the first i where l[i] <= n <= l[i+1].
+	i = max(int(np.searchsorted(l, n, side="left")) - 1, 0)
+	if i >= len(l) - 1: # Reached the end of the list, so this must be the last item.
+		return 100
+
+	return (i * 100) / len(l)
+
+def isLoveHateCorrect(lh, percentile):
+	return (lh == 'L' and percentile >= 67) or (lh == 'H' and percentile <= 33)
+
+def getLoveHateChance(l, lh):
+	# The chance that a pick would have been correct had it been a random player; l is sorted like getPercentile()'s.
+	if len(l) == 0:
+		return None
+	i = np.maximum(np.searchsorted(l, l, side="left") - 1, 0) # getPercentile() for every player at once.
+	percentiles = np.where(i >= len(l) - 1, 100, (i * 100) / len(l))
+	return float(np.mean(percentiles >= 67 if lh == 'L' else percentiles <= 33))
+
+class LoveHateScorer:
+	# Records love/hate verdicts and keeps running tallies per week, per position and for the whole season, so reading
+	# any of them never has to rescan the history.
+	def __init__(self):
+		self.verdicts = dict() # Maps from player name to week to (position, love/hate, correct, percentile, chance).
+		self.counts = dict() # Maps from (week, position, love/hate) to [correct, total]; None means "all".
+
+	def record(self, name, week, position, lh, percentile, chance=None):
+		correct = isLoveHateCorrect(lh, percentile)
+
+		if name not in self.verdicts: self.verdicts[name] = dict()
+		if week in self.verdicts[name]: # A repeated line replaces the earlier verdict.
+			self.updateCounts(week, *self.verdicts[name][week][:3], sign=-1)
+
+		self.verdicts[name][week] = (position, lh, correct, percentile, chance)
+		self.updateCounts(week, position, lh, correct)
+
+		return correct
+
+	def updateCounts(self, week, position, lh, correct, sign=1):
+		for key in [(week, position, lh), (week, None, lh), (None, position, lh), (None, None, lh)]:
+			if key not in self.counts: self.counts[key] = [0, 0]
+			self.counts[key][0] += sign * int(correct)
+			self.counts[key][1] += sign
+
+	def getCounts(self, lh, week=None, position=None):
+		return tuple(self.counts.get((week, position, lh), (0, 0)))
+
+	def getPicks(self, lh):
+		# (correct, chance) for every current love or hate verdict, the same picks getCounts() tallies. Sorted by week
+		# and name so reruns draw the same bootstrap samples.
+		picks = sorted((week, name, correct, chance) for (name, weeks_verdicts) in self.verdicts.items()
+			for (week, (_, verdict_lh, correct, _, chance)) in weeks_verdicts.items() if verdict_lh == lh)
+		return [(correct, chance) for (_, _, correct, chance) in picks]
+
+	def discard(self, week):
+		for weeks_verdicts in self.verdicts.values():
+			if week in weeks_verdicts:
+				self.updateCounts(week, *weeks_verdicts.pop(week)[:3], sign=-1)
+
+def normalizePlayerName(s, warn=True):
 	split = s.split()
 	if len(split) == 2:
 		first, last = split
 	elif len(split) == 3:
 		first, last, _ = split
 	else:
-		print(getStringInColor(Fore.YELLOW, "Warning: weird name to split -> {}".format()))
+		if warn:
+			print(getStringInColor(Fore.YELLOW, "Warning: weird name to split -> {}".format(s)))
 		return s
 
 	if first == "DJ": first = "D.J."
@@ -138,41 +1068,37 @@ def getDashedString(n=100, lines=1, color=Fore.GREEN):
 	return getStringInColor(color, s.strip())
 
 def getCumulativeRankings(weeks=None, positions=None):
-	weeks = list(range(1, getCurrentWeek()+1) if not weeks else (range(int(weeks.split("-")[0]), int(weeks.split("-")[1])+1)) if "-" in weeks else range(int(weeks.split("-")[0]), int(weeks.split("-")[0])+1))
-	positions = list(ALL_POSITIONS_LIST) if positions == '' else positions.lower().split(",")
+	weeks = parseWeeks(weeks or "")
+	positions = list(ALL_POSITIONS_LIST) if not positions else positions.lower().split(",")
+	positions = [position for position in positions if position in ALL_POSITIONS_LIST] # Season points only cover these.
+
+	players = getPlayerRegistry()
+
+	weeks_stats = prefetchWeekStats(weeks) # Starts downloading while waiting for the answer below.
 
 	print("\n")
 	option = getValidInput("\nPer-game average (pg) or cumulative (c)? ", lambda x: x.lower() in ["pg", "c"])
 	print("\n")
 
-	for pos in positions:
-		print("\n" + getStringInColor(Fore.YELLOW, pos.upper() + "s"))
-		position_pts_dict = dict()
-		for wk in weeks:
-			stats, names = getPositionResults(pos, wk)
-			for player_id, player_stats in stats:
-				weeks_pts = player_stats['pts_ppr' if 'pts_ppr' in player_stats else 'pts_std']
+	season_points = SeasonPoints()
+	for wk, stats in weeks_stats:
+		if stats is not None:
+			season_points.addWeek(getWeekPartition(wk, stats))
+
+	# Switching views only re-slices the season's points; nothing gets refetched.
+	while option != "":
+		for pos in positions:
+			print("\n" + getStringInColor(Fore.YELLOW, pos.upper() + "s"))
+			for i, (player_id, pts, games) in enumerate(season_points.getTop(pos, per_game=(option == "pg")), start=1):
 				if option == "c":
-					if player_id not in position_pts_dict: position_pts_dict[player_id] = 0
-					position_pts_dict[player_id] += weeks_pts
+					print("\t{}) {} -> {} pts".format(i, players.getDisplayName(player_id), pts))
 				else:
-					if player_id not in position_pts_dict: position_pts_dict[player_id] = list()
-					position_pts_dict[player_id].append(weeks_pts)
-
-		if option == "pg":
-			position_pts_dict = {k: v for (k, v) in position_pts_dict.items() if len(v) >= 3} # 3-game minimum for per-game averages.
-			for player_id in position_pts_dict:
-				position_pts_dict[player_id] = (average(position_pts_dict[player_id]), len(position_pts_dict[player_id]))
-
-		positions_pts_list = sorted(position_pts_dict, key=position_pts_dict.get, reverse=True)
-		for i, player_id in enumerate(positions_pts_list[:15], start=1):
-			if option == "c":
-				print("\t{}) {} -> {} pts".format(i, players_dict[player_id][('full_name' if pos != 'def' else 'last_name')], position_pts_dict[player_id]))
-			else:
-				print("\t{}) {} -> {} average pts ({} games)".format(i, players_dict[player_id][('full_name' if pos != 'def' else 'last_name')], position_pts_dict[player_id][0], position_pts_dict[player_id][1]))
-		
-		if pos != positions[-1]:
-			_ = input("")
+					print("\t{}) {} -> {} average pts ({} games)".format(i, players.getDisplayName(player_id), pts, games))
+
+			if pos != positions[-1]:
+				_ = input("")
+
+		option = getValidInput("\nSwitch to per-game average (pg) or cumulative (c)? Press enter to finish: ", lambda x: x.lower() in ["pg", "c", ""])
 
 def getValidInput(prompt, test):
 	user = re.sub(r"\s+", "", input(prompt)).lower()
@@ -182,10 +1108,1138 @@ def getValidInput(prompt, test):
 
 	return user
 
-def getCurrentWeek():
-	d1 = date(2019, 9, 8) # Sunday of week 1.
+def getSeasonStartDate(season=SEASON):
+	# Week 1 kicks off the weekend after Labor Day (the first Monday in September); this returns that Sunday.
+	labor_day = date(season, 9, 1) + timedelta(days=(7 - date(season, 9, 1).weekday()) % 7)
+	return labor_day + timedelta(days=6)
+
+def getLastWeek(season=SEASON):
+	return 17 if season < 2021 else 18 # The regular season grew to 18 weeks in 2021.
+
+def getCurrentWeek(season=SEASON):
+	d1 = getSeasonStartDate(season) # Sunday of week 1.
 	d2 = date.today()
-	return ((d2-d1).days // 7) + 1
+	return max(0, min(((d2-d1).days // 7) + 1, getLastWeek(season)))
+
+def parseWeeks(s, season=SEASON):
+	# "5" -> [5], "3-16" -> [3, ..., 16], "" -> every week of the season so far.
+	if s.strip() == "":
+		return list(range(1, getCurrentWeek(season) + 1))
+	if "-" in s:
+		return list(range(int(s.split("-")[0]), int(s.split("-")[1]) + 1))
+	return [int(s)]
+
+
+########################################## ANALYSIS ##########################################
+
+def getWeekDirectory(week, season=SEASON):
+	# The original season's files live in weekN/ at the top level; any other season's go in <season>/weekN/.
+	return "week{}".format(week) if season == SEASON else os.path.join(str(season), "week{}".format(week))
+
+def parseExpertRankings(file_path, position):
+	# Each player takes two lines: "1. Patrick Mahomes, KC" and then the opponent, each expert's rank and their average,
+	# e.g. "Bal	1	1	1	1	1	1	1.0". Returns the player names, a players x columns rank matrix (NaN for "NR") and
+	# the column names, which are the individual experts followed by their average, plus each player's team.
+	with open(file_path) as position_rankings_file:
+		rankings_list = list()
+		teams = list()
+		rank_rows = list()
+
+		# Iterate through the lines of rankings and extract each player name, their team and their ranks.
+		text = position_rankings_file.readlines()
+		for i in range(0, len(text), 2):
+			match = re.search(r'[0-9]\. (.*), (\w*)', text[i])
+			if match:
+				rankings_list.append(normalizePlayerName(match.group(1)))
+				teams.append(match.group(2))
+				if position == 'def':
+					rankings_list[-1] = rankings_list[-1].replace(" D/ST", "")
+
+				columns = text[i+1].split("\t")[1:] if i + 1 < len(text) else list()
+				rank_rows.append([float(column) if re.fullmatch(r'[0-9.]+', column.strip()) else np.nan for column in columns])
+
+	num_columns = max([len(row) for row in rank_rows] + [0])
+	ranks = np.full((len(rank_rows), num_columns), np.nan)
+	for row, row_ranks in enumerate(rank_rows):
+		ranks[row, :len(row_ranks)] = row_ranks
+
+	experts = ["expert{}".format(i) for i in range(1, num_columns)] + (["average"] if num_columns else list())
+	return rankings_list, ranks, experts, teams
+
+def parseLoveHateFile(file_path):
+	with open(file_path) as lh_file:
+		picks = list()
+		for line in lh_file.readlines():
+			if line.strip() == '': continue
+
+			position, lh, full_name = map(str.strip, line.split("/"))
+			picks.append((position, lh, normalizePlayerName(full_name)))
+
+	return picks
+
+def getFileHash(file_path):
+	with open(file_path, "rb") as f:
+		return hashlib.sha1(f.read()).hexdigest()
+
+def getWeekDirectories():
+	# Yields (season, week, directory) for every week directory of rankings on disk, in order.
+	seasons = sorted([int(name) for name in os.listdir(".") if re.fullmatch(r'[0-9]{4}', name) and os.path.isdir(name)] + [SEASON])
+	for season in seasons:
+		parent = "." if season == SEASON else str(season)
+		weeks = [int(name[4:]) for name in os.listdir(parent) if re.fullmatch(r'week[0-9]+', name)]
+		for week in sorted(weeks):
+			yield season, week, getWeekDirectory(week, season)
+
+class RankingsStore:
+	# Every weekly rankings and love/hate file compiled into columns, one .npy file per column per table, memory-mapped
+	# when opened. Each source file's rows are contiguous, so its data is a slice; the manifest records each source
+	# file's slice alongside the mtime, size and SHA-1 it was compiled from.
+	def __init__(self, directory=STORE_DIR):
+		self.directory = directory
+		self.manifest = {'version': STORE_VERSION, 'fingerprint': "", 'sources': dict()}
+		self.tables = {table: dict() for table in STORE_TABLES}
+
+		manifest_path = os.path.join(directory, "manifest.json")
+		if os.path.exists(manifest_path):
+			try:
+				with open(manifest_path) as manifest_file:
+					manifest = json.load(manifest_file)
+				if manifest['version'] == STORE_VERSION:
+					self.tables = {table: {column: np.load(os.path.join(directory, table, column + ".npy"), mmap_mode="r")
+						for column in columns} for (table, columns) in STORE_TABLES.items()}
+					self.manifest = manifest
+			except (OSError, ValueError, KeyError):
+				pass
+
+	def getSource(self, file_path):
+		# The manifest entry for the file if the store is up to date with it, otherwise None.
+		source = self.manifest['sources'].get(os.path.normpath(file_path))
+		try:
+			stat = os.stat(file_path)
+		except OSError:
+			return None
+		if source is None or source['mtime'] != stat.st_mtime_ns or source['size'] != stat.st_size:
+			return None
+		return source
+
+	def getSlice(self, source):
+		table = self.tables[source['table']]
+		rows = slice(source['start'], source['stop'])
+		ids = None
+		if self.manifest['fingerprint'] == getPlayerRegistry().fingerprint: # Otherwise the ids are stale.
+			ids = [player_id or None for player_id in table['player_id'][rows].tolist()]
+		return table, rows, ids
+
+	def getExpertRankings(self, source):
+		# Same as parseExpertRankings(), plus the players' ids (None where they need resolving against the week's stats).
+		table, rows, ids = self.getSlice(source)
+		ranks = np.asarray(table['ranks'][rows, :source['columns']], dtype=float)
+		experts = ["expert{}".format(i) for i in range(1, source['columns'])] + (["average"] if source['columns'] else list())
+		return table['name'][rows].tolist(), ranks, experts, table['team'][rows].tolist(), ids
+
+	def getLoveHatePicks(self, source):
+		# Same as parseLoveHateFile(), plus the players' ids.
+		table, rows, ids = self.getSlice(source)
+		picks = [(position, 'L' if love else 'H', name) for (position, love, name) in
+			zip(table['position'][rows].tolist(), table['love'][rows].tolist(), table['name'][rows].tolist())]
+		return picks, ids
+
+	def compileSource(self, file_path, season, week, table):
+		# Parses one file into a dict of columns.
+		index = getNameIndex()
+		if table == "rankings":
+			position = os.path.basename(file_path)[:-len(".txt")]
+			rankings_list, ranks, _, teams = parseExpertRankings(file_path, position)
+			teams = [index.getTeam(team).upper() for team in teams]
+			ids = [index.resolve(name, position, team, unique=True) or "" for (name, team) in zip(rankings_list, teams)]
+			columns = {'position': [position] * len(rankings_list), 'name': rankings_list, 'team': teams, 'ranks': ranks}
+		else:
+			picks = parseLoveHateFile(file_path)
+			ids = [index.resolve(name, position, unique=True) or "" for (position, _, name) in picks]
+			columns = {'position': [position for position, _, _ in picks], 'name': [name for _, _, name in picks],
+				'love': np.array([lh == 'L' for _, lh, _ in picks], dtype=bool)}
+
+		n = len(ids)
+		columns.update({'season': np.full(n, season, dtype=np.int16), 'week': np.full(n, week, dtype=np.int8), 'player_id': ids})
+		return columns
+
+	def update(self):
+		# Recompiles only the source files whose mtime or size changed and whose contents did too, then rewrites the
+		# columns. Every file is recompiled when the player registry changes, since resolved ids depend on it. Returns
+		# the number of files compiled and the number reused.
+		fingerprint = getPlayerRegistry().fingerprint
+		reusable = (self.manifest['fingerprint'] == fingerprint)
+		sources = dict()
+		parts = {table: list() for table in STORE_TABLES}
+		compiled, reused = 0, 0
+
+		for season, week, directory in getWeekDirectories():
+			for file_name, table in [("{}.txt".format(position), "rankings") for position in ALL_POSITIONS_LIST] + [("love_hate.txt", "love_hate")]:
+				file_path = os.path.normpath(os.path.join(directory, file_name))
+				if not os.path.exists(file_path): continue
+
+				stat = os.stat(file_path)
+				source = self.manifest['sources'].get(file_path)
+				if reusable and source and (self.getSource(file_path) or source['sha1'] == getFileHash(file_path)):
+					table_columns = self.tables[table]
+					columns = {column: table_columns[column][source['start']:source['stop']] for column in STORE_TABLES[table]}
+					reused += 1
+				else:
+					columns = self.compileSource(file_path, season, week, table)
+					source = {'sha1': getFileHash(file_path), 'columns': columns['ranks'].shape[1] if table == "rankings" else 0}
+					compiled += 1
+
+				start = sum(len(part['season']) for part in parts[table])
+				parts[table].append(columns)
+				sources[file_path] = {'table': table, 'season': season, 'week': week, 'start': start, 'stop': start + len(columns['season']),
+					'mtime': stat.st_mtime_ns, 'size': stat.st_size, 'sha1': source['sha1'], 'columns': source['columns']}
+
+		tables = dict()
+		for table, columns in STORE_TABLES.items():
+			# Reused rows are views of the current memory maps, so this copies them before the files get replaced.
+			tables[table] = dict()
+			for column in columns:
+				values = [part[column] for part in parts[table] if len(part[column])]
+				if column == "ranks":
+					width = max([value.shape[1] for value in values] + [0])
+					values = [np.pad(np.asarray(value), ((0, 0), (0, width - value.shape[1])), constant_values=np.nan) for value in values]
+					tables[table][column] = np.concatenate(values) if values else np.empty((0, 0))
+				else:
+					tables[table][column] = np.concatenate([np.asarray(value) for value in values]) if values else np.empty(0)
+
+		# Write everything under temporary names first so that a crash never leaves a half-written store behind.
+		manifest = {'version': STORE_VERSION, 'fingerprint': fingerprint, 'sources': sources}
+		paths = list()
+		for table in tables:
+			os.makedirs(os.path.join(self.directory, table), exist_ok=True)
+			for column, values in tables[table].items():
+				path = os.path.join(self.directory, table, column + ".npy")
+				with open("{}.{}.tmp".format(path, os.getpid()), "wb") as column_file:
+					np.save(column_file, values)
+				paths.append(path)
+		manifest_path = os.path.join(self.directory, "manifest.json")
+		with open("{}.{}.tmp".format(manifest_path, os.getpid()), "w") as manifest_file:
+			json.dump(manifest, manifest_file, indent=1)
+
+		del parts
+		self.tables = {table: dict() for table in STORE_TABLES} # Drop the memory maps before replacing their files.
+		for path in paths + [manifest_path]:
+			os.replace("{}.{}.tmp".format(path, os.getpid()), path)
+
+		self.__init__(self.directory)
+		return compiled, reused
+
+def getRankingsStore():
+	global RANKINGS_STORE
+
+	if RANKINGS_STORE is None:
+		RANKINGS_STORE = RankingsStore()
+
+	return RANKINGS_STORE
+
+def getExpertRankings(file_path, position):
+	# parseExpertRankings() plus pre-resolved ids, read from the rankings store when it's up to date with the file.
+	source = getRankingsStore().getSource(file_path)
+	if source is not None:
+		countEvent("store_hits")
+		return getRankingsStore().getExpertRankings(source)
+	return parseExpertRankings(file_path, position) + (None,)
+
+def getLoveHatePicks(file_path):
+	source = getRankingsStore().getSource(file_path)
+	if source is not None:
+		countEvent("store_hits")
+		return getRankingsStore().getLoveHatePicks(source)
+	return parseLoveHateFile(file_path), None
+
+def getSourceHash(file_path):
+	source = getRankingsStore().getSource(file_path)
+	return source['sha1'] if source is not None else getFileHash(file_path)
+
+def importRankings():
+	start = time.perf_counter()
+	compiled, reused = getRankingsStore().update()
+	print("Compiled {} file(s) and reused {} into {} in {:.2f}s.".format(compiled, reused, STORE_DIR, time.perf_counter() - start))
+
+def getResultsCachePath(week, season=SEASON, profile=None):
+	return os.path.join(RESULTS_CACHE_DIR, str(season), profile or SCORING_PROFILE, "week{}.json".format(week))
+
+def readResultsCache(week, season=SEASON, profile=None):
+	if not RESULTS_CACHE_DIR or not os.path.exists(getResultsCachePath(week, season, profile)):
+		return {'rankings': dict(), 'love_hate': None}
+
+	try:
+		with open(getResultsCachePath(week, season, profile)) as cache_file:
+			return json.load(cache_file)
+	except (OSError, ValueError):
+		return {'rankings': dict(), 'love_hate': None}
+
+def writeResultsCache(week, cache, season=SEASON, profile=None):
+	if not RESULTS_CACHE_DIR:
+		return
+
+	path = getResultsCachePath(week, season, profile)
+	os.makedirs(os.path.dirname(path), exist_ok=True)
+	tmp_path = "{}.{}.tmp".format(path, os.getpid())
+	with open(tmp_path, "w") as cache_file:
+		json.dump(cache, cache_file, separators=(",", ":"))
+	os.replace(tmp_path, path)
+
+def getArrayFromJson(values, dtype=float):
+	return np.array([np.nan if value is None else value for value in values], dtype=dtype)
+
+def getMetricsFromJson(metrics):
+	# Undoes getJsonSafe() for a compareRankings() result: NumPy arrays come back and None goes back to NaN.
+	metrics = dict(metrics)
+	for metric in RANKING_METRICS_LIST:
+		if metrics[metric] is None: metrics[metric] = float("nan")
+	for array in ['errors', 'predicted_positions', 'actual_positions']:
+		metrics[array] = np.array(metrics[array], dtype=np.int64)
+
+	if metrics.get('experts'):
+		experts_metrics = dict(metrics['experts'])
+		for metric in RANKING_METRICS_LIST:
+			experts_metrics[metric] = getArrayFromJson(experts_metrics[metric])
+		experts_metrics['n'] = np.array(experts_metrics['n'], dtype=np.int64)
+		experts_metrics['errors'] = np.array(experts_metrics['errors'], dtype=np.int64).reshape(len(experts_metrics['players']), len(experts_metrics['experts']))
+		metrics['experts'] = experts_metrics
+
+	return metrics
+
+def resolveLoveHatePicks(file_path, positions, stats=None):
+	# The file's picks at the given positions as (position, love/hate, name, player id or None).
+	picks_list, ids = getLoveHatePicks(file_path)
+	resolved = list()
+	for i, (position, lh, full_name) in enumerate(picks_list):
+		if position.lower() not in positions: continue
+		resolved.append((position, lh, full_name, (ids and ids[i]) or getNameIndex().resolve(full_name, position, stats=stats)))
+
+	return resolved
+
+def scoreLoveHate(week, stats, file_path, positions=None, season=SEASON, profile=None, resolved=None):
+	# resolved can hold resolveLoveHatePicks()'s result so that scoring under several profiles resolves the picks once.
+	positions = [position.lower() for position in (positions or ALL_POSITIONS_LIST)]
+	partition = getWeekPartition(week, stats, season, profile)
+	picks = list()
+
+	for position, lh, full_name, player_id in (resolved if resolved is not None else resolveLoveHatePicks(file_path, positions, stats)):
+		pick = {'name': full_name, 'position': position, 'lh': lh, 'status': "ok", 'points': None, 'percentile': None, 'correct': None,
+			'chance': None}
+		picks.append(pick)
+
+		if player_id is None:
+			pick['status'] = "not_found"
+		elif partition.getPoints(player_id, position) is None:
+			pick['status'] = "no_stats"
+		else:
+			pick['points'] = partition.getPoints(player_id, position)
+			pick['percentile'] = getPercentile(partition.getSortedPoints(position), pick['points'])
+			pick['correct'] = isLoveHateCorrect(lh, pick['percentile'])
+			pick['chance'] = getLoveHateChance(partition.getSortedPoints(position), lh)
+
+	return picks
+
+def analyzeWeek(week, stats, season=SEASON, positions=None, sources=None, profile=None):
+	# Scores one week's rankings and love/hate picks against its stats, under a scoring profile, without printing
+	# anything. A position maps to None when it has no rankings file, and love_hate is None when there's no love/hate file.
+	return analyzeWeekProfiles(week, stats, season, positions, sources, [profile or SCORING_PROFILE])[0]
+
+def analyzeWeekProfiles(week, stats, season=SEASON, positions=None, sources=None, profiles=None):
+	# analyzeWeek() under several scoring profiles at once, returning one result per profile. Each rankings and love/hate
+	# file is read and resolved to player ids at most once, then compared against every profile's WeekPartition.
+	#
+	# Past weeks' files and final stats never change, so results are cached per position-week under a key made of the
+	# input files' contents, the stats payload, the scoring profile and the player snapshot. Only new or modified inputs
+	# get recomputed.
+	profiles = profiles or [SCORING_PROFILE]
+	positions = [position.lower() for position in (positions or ALL_POSITIONS_LIST)]
+	sources = sources or ALL_SOURCES_LIST
+	all_week_results = [{'season': season, 'week': week, 'scoring': profile, 'rankings': dict(), 'love_hate': None} for profile in profiles]
+
+	caches = [readResultsCache(week, season, profile) for profile in profiles]
+	caches_changed = [False] * len(profiles)
+	stats_hash = getStatsHash(week, stats, season)
+	base_keys = ["{}:{}:{}:{}".format(RESULTS_CACHE_VERSION, stats_hash, getProfileHash(profile), getPlayerRegistry().fingerprint) for profile in profiles]
+	players = getPlayerRegistry()
+
+	### First, compare rankings to actual performances for each position group.
+	if "rankings" in sources:
+		for position in positions:
+			file_path = os.path.join(getWeekDirectory(week, season), "{}.txt".format(position))
+			if not os.path.exists(file_path):
+				for week_results in all_week_results:
+					week_results['rankings'][position] = None
+				continue
+
+			source_hash = getSourceHash(file_path)
+			parsed = None # Only read and resolved if some profile misses the cache.
+			for i, profile in enumerate(profiles):
+				key = "{}:{}".format(base_keys[i], source_hash)
+				cached = caches[i]['rankings'].get(position)
+				if cached and cached['key'] == key:
+					countEvent("results_cache_hits")
+					all_week_results[i]['rankings'][position] = getMetricsFromJson(cached['metrics'])
+					continue
+				countEvent("results_cache_misses")
+
+				if parsed is None:
+					rankings_list, ranks, experts, teams, ids = getExpertRankings(file_path, position)
+					parsed = (resolveRankings(rankings_list, teams, position, stats, ids), ranks, experts)
+				predicted_ids, ranks, experts = parsed
+
+				# Compare by player id, then report players by their display names.
+				partition = getWeekPartition(week, stats, season, profile)
+				metrics = compareRankings(predicted_ids, partition.ids[position])
+				metrics['experts'] = compareExpertRankings(predicted_ids, ranks, partition.ids[position], experts)
+				for position_metrics in [metrics, metrics['experts']]:
+					position_metrics['players'] = [players.getDisplayName(p) if p in players else p for p in position_metrics['players']]
+				all_week_results[i]['rankings'][position] = metrics
+
+				caches[i]['rankings'][position] = {'key': key, 'metrics': getJsonSafe(metrics)}
+				caches_changed[i] = True
+
+	### Second, compare Berry's love/hate to actual performances.
+	file_path = os.path.join(getWeekDirectory(week, season), "love_hate.txt")
+	if "love_hate" in sources and os.path.exists(file_path):
+		source_hash = getSourceHash(file_path)
+		resolved = None
+		for i, profile in enumerate(profiles):
+			key = "{}:{}:{}".format(base_keys[i], source_hash, ",".join(positions))
+			cached = caches[i]['love_hate']
+
+			if cached and cached['key'] == key:
+				countEvent("results_cache_hits")
+				all_week_results[i]['love_hate'] = cached['picks']
+			else:
+				countEvent("results_cache_misses")
+				if resolved is None:
+					resolved = resolveLoveHatePicks(file_path, positions, stats)
+				all_week_results[i]['love_hate'] = scoreLoveHate(week, stats, file_path, positions, season, profile, resolved)
+				caches[i]['love_hate'] = {'key': key, 'picks': getJsonSafe(all_week_results[i]['love_hate'])}
+				caches_changed[i] = True
+
+	for i, profile in enumerate(profiles):
+		if caches_changed[i]:
+			writeResultsCache(week, caches[i], season, profile)
+
+	return all_week_results
+
+class RollingSeries:
+	# A weekly series with a mean over the last `window` weeks and an exponentially weighted mean, both updated in O(1)
+	# as each week is added. Weeks normally arrive in order; one that doesn't (or a repeated week) rebuilds the series.
+	__slots__ = ("window", "alpha", "values", "recent", "recent_sum", "ewma", "history")
+
+	def __init__(self, window=ROLLING_WINDOW, alpha=EWMA_ALPHA):
+		self.window = window
+		self.alpha = alpha
+		self.values = dict() # Maps from week to value.
+		self.recent = deque() # (week, value) for the weeks in the window.
+		self.recent_sum = 0.0
+		self.ewma = None
+		self.history = list() # (week, window mean, EWMA) as of each week.
+
+	def add(self, week, value):
+		if value != value: return # NaN weeks don't count.
+
+		out_of_order = self.history and week <= self.history[-1][0]
+		self.values[week] = value
+		if out_of_order:
+			self.rebuild()
+		else:
+			self.push(week, value)
+
+	def discard(self, week):
+		if self.values.pop(week, None) is not None:
+			self.rebuild()
+
+	def rebuild(self):
+		values = sorted(self.values.items())
+		self.__init__(self.window, self.alpha)
+		self.values = dict(values)
+		for week, value in values:
+			self.push(week, value)
+
+	def push(self, week, value):
+		self.recent.append((week, value))
+		self.recent_sum += value
+		while self.recent[0][0] <= week - self.window:
+			self.recent_sum -= self.recent.popleft()[1]
+
+		self.ewma = value if self.ewma is None else self.alpha * value + (1 - self.alpha) * self.ewma
+		self.history.append((week, self.recent_sum / len(self.recent), self.ewma))
+
+	def getLatest(self):
+		# (window mean, EWMA) as of the last week.
+		return self.history[-1][1:] if self.history else (float("nan"), float("nan"))
+
+class AccuracyTrends:
+	# Rolling and exponentially weighted accuracy series per position, per expert and per player, plus each week's
+	# coefficients for ordering the weeks from best to worst predicted.
+	def __init__(self, window=ROLLING_WINDOW, alpha=EWMA_ALPHA):
+		self.window = window
+		self.alpha = alpha
+		self.series = dict() # Maps from (kind, position, name, metric) to a RollingSeries; kind is "position", "expert" or "player".
+		self.weeks_coefficients = dict() # Maps from week to position to Kendall coefficient.
+
+	def add(self, kind, position, name, metric, week, value):
+		key = (kind, position, name, metric)
+		if key not in self.series: self.series[key] = RollingSeries(self.window, self.alpha)
+		self.series[key].add(week, value)
+
+	def addWeek(self, week, position, coefficient):
+		if coefficient == coefficient:
+			self.weeks_coefficients.setdefault(week, dict())[position] = coefficient
+
+	def discard(self, week):
+		# Only the series that have the week get rebuilt.
+		for key in list(self.series):
+			self.series[key].discard(week)
+			if not self.series[key].values: del self.series[key]
+		self.weeks_coefficients.pop(week, None)
+
+	def getLatest(self, kind, position, name, metric):
+		series = self.series.get((kind, position, name, metric))
+		return series.getLatest() if series else (float("nan"), float("nan"))
+
+	def getWeeksOrder(self):
+		# [(week, average Kendall coefficient across positions)], best predicted week first.
+		weeks = [(week, average(list(coefficients.values()))) for (week, coefficients) in self.weeks_coefficients.items()]
+		return sorted(weeks, key=lambda x: x[1], reverse=True)
+
+	def getSummary(self):
+		summary = {'window': self.window, 'alpha': self.alpha, 'positions': dict(), 'experts': dict(), 'players': dict(),
+			'weeks_order': self.getWeeksOrder()}
+		for (kind, position, name, metric), series in self.series.items():
+			entry = {'rolling': series.getLatest()[0], 'ewma': series.getLatest()[1]}
+			if kind == "position":
+				entry['series'] = series.history
+				summary['positions'].setdefault(position, dict())[metric] = entry
+			else:
+				summary[kind + "s"].setdefault(position, dict()).setdefault(name, dict())[metric] = entry
+
+		return summary
+
+class SeasonResults:
+	# Cumulative results for one season under one scoring profile, built up from one analyzeWeek() result at a time.
+	def __init__(self, season=SEASON, profile=None):
+		self.season = season
+		self.profile = profile or SCORING_PROFILE
+		self.weeks = list()
+		self.results_dict = dict() # Maps from position group to weekly results.
+		self.players_results_dict = dict() # Maps from position to player name to weekly results.
+		self.experts_results_dict = dict() # Maps from position to expert to weekly results.
+		self.positions_dict = dict() # Maps from position to week to (predicted positions, actual positions).
+		self.love_hate_scorer = LoveHateScorer()
+		self.trends = AccuracyTrends()
+
+	def add(self, week_results):
+		week = week_results['week']
+		if week not in self.weeks: self.weeks.append(week)
+
+		for position, metrics in week_results['rankings'].items():
+			if not metrics or metrics['n'] == 0: continue
+
+			if position not in self.players_results_dict: self.players_results_dict[position] = dict()
+			for p, error in zip(metrics['players'], metrics['errors']):
+				if p not in self.players_results_dict[position]:
+					self.players_results_dict[position][p] = dict()
+				if week not in self.players_results_dict[position][p]:
+					self.players_results_dict[position][p][week] = int(error)
+					self.trends.add("player", position, p, "error", week, int(error))
+
+			if position not in self.results_dict: self.results_dict[position] = dict()
+			self.results_dict[position][week] = {metric: metrics[metric] for metric in RANKING_METRICS_LIST}
+			for metric in RANKING_METRICS_LIST:
+				self.trends.add("position", position, None, metric, week, metrics[metric])
+			self.trends.addWeek(week, position, metrics['coefficient'])
+			if position not in self.positions_dict: self.positions_dict[position] = dict()
+			self.positions_dict[position][week] = (np.asarray(metrics['predicted_positions']), np.asarray(metrics['actual_positions']))
+
+			experts_metrics = metrics.get('experts')
+			if experts_metrics:
+				if position not in self.experts_results_dict: self.experts_results_dict[position] = dict()
+				for i, expert in enumerate(experts_metrics['experts']):
+					if experts_metrics['n'][i] == 0: continue
+					if expert not in self.experts_results_dict[position]: self.experts_results_dict[position][expert] = dict()
+					self.experts_results_dict[position][expert][week] = {metric: float(experts_metrics[metric][i]) for metric in RANKING_METRICS_LIST}
+					for metric in ["coefficient", "avg_difference"]:
+						self.trends.add("expert", position, expert, metric, week, float(experts_metrics[metric][i]))
+
+		for pick in week_results['love_hate'] or list():
+			if pick['status'] == "ok":
+				self.love_hate_scorer.record(pick['name'], week, pick['position'], pick['lh'], pick['percentile'], pick['chance'])
+
+	def discard(self, week):
+		# Takes a week back out, e.g. before adding it again with updated results.
+		if week not in self.weeks: return
+		self.weeks.remove(week)
+
+		for nested in [self.results_dict, self.positions_dict, self.players_results_dict, self.experts_results_dict]:
+			for position in list(nested):
+				if nested in [self.players_results_dict, self.experts_results_dict]:
+					for name in list(nested[position]):
+						nested[position][name].pop(week, None)
+						if not nested[position][name]: del nested[position][name]
+				else:
+					nested[position].pop(week, None)
+				if not nested[position]: del nested[position]
+
+		self.love_hate_scorer.discard(week)
+		self.trends.discard(week)
+
+	def getExpertsTable(self):
+		# Maps from position (plus "ALL") to expert to each metric averaged over the season; NaN weeks are left out.
+		table = dict()
+		for position in self.experts_results_dict:
+			for expert, weeks_results in self.experts_results_dict[position].items():
+				for table_position in [position, "ALL"]:
+					if table_position not in table: table[table_position] = dict()
+					if expert not in table[table_position]: table[table_position][expert] = {metric: list() for metric in RANKING_METRICS_LIST}
+					for results in weeks_results.values():
+						for metric in RANKING_METRICS_LIST:
+							table[table_position][expert][metric].append(results[metric])
+
+		for position in table:
+			for expert in table[position]:
+				for metric, values in table[position][expert].items():
+					values = [value for value in values if value == value]
+					table[position][expert][metric] = average(values) if values else float("nan")
+
+		return table
+
+	def getSignificance(self, resamples=RESAMPLES, seed=RESAMPLE_SEED, max_workers=None):
+		# Confidence intervals and p-values for every position's average metrics and for the love and hate hit rates.
+		# Each position and each of love/hate is an independent task with its own seed, spread over processes.
+		positions = [position for position in ALL_POSITIONS_LIST if position in self.positions_dict]
+		tasks = [(getRankingsSignificance, ([self.positions_dict[position][week] for week in sorted(self.positions_dict[position])], resamples))
+			for position in positions]
+		for lh in ['L', 'H']:
+			picks = self.love_hate_scorer.getPicks(lh) # The same verdicts as the printed hit counts.
+			tasks.append((getLoveHateSignificance, (np.array([correct for correct, _ in picks], dtype=float),
+				np.array([chance for _, chance in picks], dtype=float), resamples)))
+
+		seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(len(tasks))]
+		max_workers = max_workers or min(len(tasks), os.cpu_count() or 1)
+		if max_workers > 1:
+			with ProcessPoolExecutor(max_workers=max_workers) as executor:
+				futures = [executor.submit(fn, args + (task_seed,)) for ((fn, args), task_seed) in zip(tasks, seeds)]
+				results = [future.result() for future in futures]
+		else:
+			results = [fn(args + (task_seed,)) for ((fn, args), task_seed) in zip(tasks, seeds)]
+
+		return {'positions': dict(zip(positions, results)), 'love_hate': dict(zip(['L', 'H'], results[len(positions):]))}
+
+	def getSummary(self):
+		summary = {'season': self.season, 'scoring': self.profile, 'weeks': sorted(self.weeks), 'positions': dict(), 'experts': self.getExpertsTable(),
+			'love_hate': dict()}
+		summary['significance'] = self.getSignificance()
+		summary['trends'] = self.trends.getSummary()
+
+		for position in self.results_dict:
+			weeks_results = self.results_dict[position].values()
+			summary['positions'][position] = {metric: average([results[metric] for results in weeks_results]) for metric in RANKING_METRICS_LIST}
+
+			p_results_list = [(p, average(list(self.players_results_dict[position][p].values()))) for p in self.players_results_dict[position]]
+			summary['positions'][position]['players'] = dict(sorted(p_results_list, key=lambda x: x[1]))
+
+		for position in [None] + LOVE_HATE_POSITIONS_LIST:
+			love_correct, love_total = self.love_hate_scorer.getCounts('L', position=position)
+			hate_correct, hate_total = self.love_hate_scorer.getCounts('H', position=position)
+			summary['love_hate'][position or "ALL"] = {'love_correct': love_correct, 'love_total': love_total,
+				'hate_correct': hate_correct, 'hate_total': hate_total}
+
+		return summary
+
+def printWeekResults(week_results, love_hate_scorer, skip_to_cumulative=False, show_lh_players=False):
+	current_week = week_results['week']
+
+	for position, metrics in week_results['rankings'].items():
+		if metrics is None:
+			print("\nNo rankings file found for {}s in week {}...skipping.".format(position.upper(), current_week))
+			continue
+		if metrics['n'] == 0:
+			print("\nNo ranked {}s played in week {}...skipping.".format(position.upper(), current_week))
+			continue
+
+		if not skip_to_cumulative:
+			print("\nResults for {} in week {} (# players = {}):".format(getStringInColor(Fore.YELLOW, position.upper() + "s"), current_week, metrics['n']))
+			print("\t\tKendall's correlation coefficient: {}".format(getStringInColor(Fore.GREEN, str(metrics['coefficient'])[:5])))
+			print("\t\tSpearman's correlation coefficient: {}".format(getStringInColor(Fore.GREEN, str(metrics['spearman'])[:5])))
+			print("\t\tTop-{} precision: {} (NDCG: {})".format(TOP_K, getStringInColor(Fore.GREEN, str(metrics['precision_at_k'])[:5]),
+				getStringInColor(Fore.GREEN, str(metrics['ndcg_at_k'])[:5])))
+			print("\t\tThe average difference score between predicted and real rankings was {}.".format(getStringInColor(Fore.GREEN, metrics['avg_difference'])))
+
+			experts_metrics = metrics.get('experts')
+			if experts_metrics and experts_metrics['experts']:
+				print("\t\tKendall's coefficient by expert: {}".format(" | ".join(["{} {}".format(expert, getStringInColor(Fore.GREEN, str(coef)[:5]))
+					for (expert, coef) in zip(experts_metrics['experts'], experts_metrics['coefficient'].tolist())])))
+
+	if week_results['love_hate'] is None:
+		print("\nNo love/hate file found for week {}...skipping.".format(current_week))
+		return
+	if skip_to_cumulative:
+		return
+
+	print("\n\nMatthew Berry's love/hate results for week {}:\n".format(current_week))
+
+	love_hate_string = ""
+	love_hate_pos = ""
+
+	for pick in week_results['love_hate']:
+		if pick['status'] == "not_found":
+			print(getStringInColor(Fore.YELLOW, "\nWarning: {} not found in the player database\n".format(pick['name'])))
+			continue
+		if pick['status'] == "no_stats":
+			print(getStringInColor(Fore.YELLOW, "\nWarning: {} doesn't have stats for week {}\n".format(pick['name'], current_week)))
+			continue
+
+		if show_lh_players:
+			if pick['position'] != love_hate_pos:
+				print("{}:".format(getStringInColor(Fore.YELLOW, pick['position'])))
+			love_hate_pos = pick['position']
+
+			if pick['lh'] != love_hate_string:
+				print("\t{}:".format("love" if pick['lh'] == 'L' else "hate"))
+			love_hate_string = pick['lh']
+
+			print(getStringInColor(Fore.GREEN if pick['correct'] else Fore.RED,
+				"\t\t\t{}: {} pts ({} percentile)".format(
+				pick['name'],
+				pick['points'],
+				pick['percentile'])))
+
+	if show_lh_players:
+		print("\n")
+
+	for position in LOVE_HATE_POSITIONS_LIST:
+		love_correct, love_total = love_hate_scorer.getCounts('L', current_week, position)
+		hate_correct, hate_total = love_hate_scorer.getCounts('H', current_week, position)
+
+		if love_total + hate_total > 0:
+			print("\tHe hit on {} (out of {}) {} loves and {} (out of {}) hates ({} correct in total)".format(
+				getStringInColor(Fore.GREEN, love_correct),
+				getStringInColor(Fore.RED, love_total),
+				getStringInColor(Fore.YELLOW, position),
+				getStringInColor(Fore.GREEN, hate_correct),
+				getStringInColor(Fore.RED, hate_total),
+				getStringInColor(Fore.GREEN, str(((love_correct + hate_correct) * 100) / (love_total + hate_total))[:5] + "%")))
+
+	love_correct, love_total = love_hate_scorer.getCounts('L', current_week)
+	hate_correct, hate_total = love_hate_scorer.getCounts('H', current_week)
+
+	print("\n")
+	print("\tIn total, he hit on {} loves out of {} ({}%)".format(
+		getStringInColor(Fore.GREEN, love_correct),
+		getStringInColor(Fore.RED, love_total), 
+		getStringInColor(Fore.GREEN, str((love_correct * 100) / love_total) if love_total else "-")))
+	print("\tIn total, he hit on {} hates out of {} ({}%)".format(
+		getStringInColor(Fore.GREEN, hate_correct),
+		getStringInColor(Fore.RED, hate_total), 
+		getStringInColor(Fore.GREEN, str((hate_correct) * 100 / hate_total) if hate_total else "-")))
+
+def printCumulativeResults(season_results, start_week, end_week, summary=None):
+	results_dict = season_results.results_dict
+	summary = summary or season_results.getSummary()
+
+	print("\n\n" + getDashedString(lines=2, color=Fore.YELLOW) + "\n\n")
+	print("These are the cumulative results using {}:".format(
+		"week {}".format(start_week) if start_week == end_week else "weeks {}-{}".format(start_week, end_week)))
+	
+	cumulative_list = list()
+
+	for position in results_dict:
+		# Analyze the position group's prediction results overall first.
+		print("\n\n{}{}s{}:".format(Fore.YELLOW, position.upper(), Style.RESET_ALL))
+		position_summary = summary['positions'][position]
+
+		avg_coefficient = position_summary['coefficient']
+		print("\tAverage coefficient: {}".format(getStringInColor(Fore.GREEN, str(avg_coefficient)[:5])))
+
+		avg_avg_difference = position_summary['avg_difference']
+		print("\tAverage of average differences: {}".format(getStringInColor(Fore.GREEN, str(avg_avg_difference)[:5])))
+
+		print("\tAverage Spearman coefficient: {}".format(getStringInColor(Fore.GREEN, str(position_summary['spearman'])[:5])))
+		print("\tAverage top-{} NDCG: {}".format(TOP_K, getStringInColor(Fore.GREEN, str(position_summary['ndcg_at_k'])[:5])))
+
+		significance = summary['significance']['positions'].get(position)
+		if significance:
+			print("\n\t{}% confidence intervals, and p-values against random rankings:".format(int(CONFIDENCE * 100)))
+			for metric in RANKING_METRICS_LIST:
+				print("\t\t{}: [{}, {}] (chance: {}, p = {})".format(metric, str(significance[metric]['ci_low'])[:5],
+					str(significance[metric]['ci_high'])[:5], str(significance[metric]['chance'])[:5], getStringInColor(Fore.GREEN, str(significance[metric]['p_value'])[:5])))
+
+		trends = summary['trends']['positions'].get(position)
+		if trends:
+			print("\n\tOver the last {} weeks: coefficient {}, average difference {} (exponentially weighted: {}, {})".format(ROLLING_WINDOW,
+				getStringInColor(Fore.GREEN, str(trends['coefficient']['rolling'])[:5]), getStringInColor(Fore.GREEN, str(trends['avg_difference']['rolling'])[:5]),
+				str(trends['coefficient']['ewma'])[:5], str(trends['avg_difference']['ewma'])[:5]))
+		
+		cumulative_list.append((position.upper(), avg_coefficient, avg_avg_difference))
+
+		# Then analyze individual players within the position group.
+		p_results_list = list(position_summary['players'].items())
+
+		print("\nThe 3 most predictable {}s were:".format(position.upper()))
+		printRankings(3, p_results_list, parenMessage="average difference from correct rank:")
+
+		print("\nThe 3 most unpredictable {}s were:".format(position.upper()))
+		printRankings(3, p_results_list[::-1], reverseRank=True, parenMessage="average difference from correct rank:")
+
+
+	cumulative_list = sorted(cumulative_list, key=lambda x: x[2])
+	print("\n\nHere are the position groups, ranked from most predictable to least predictable:")
+	for i, pos in enumerate(cumulative_list, start=1):
+		print(str(i) + ") " + getStringInColor(Fore.YELLOW, pos[0]))
+	# print("\n\nThe most predictable position group was: {}".format(getStringInColor(Fore.YELLOW, cumulative_list[0][0])))
+	# print("\nThe most unpredictable position group was: {}".format(getStringInColor(Fore.YELLOW, cumulative_list[-1][0])))
+
+	experts_table = summary['experts']
+	if experts_table:
+		print("\n\nHere's how each expert did (average Kendall coefficient / average difference):")
+		positions = [position for position in ALL_POSITIONS_LIST if position in experts_table] + ["ALL"]
+		print("\t\t" + "\t".join([getStringInColor(Fore.YELLOW, position.upper()) for position in positions]))
+		for expert in experts_table["ALL"]:
+			print("\t{}\t".format(expert) + "\t".join(["{}/{}".format(str(experts_table[position][expert]['coefficient'])[:5],
+				str(experts_table[position][expert]['avg_difference'])[:5]) if expert in experts_table[position] else "-" for position in positions]))
+
+	total_love_correct, total_love_total = season_results.love_hate_scorer.getCounts('L')
+	total_hate_correct, total_hate_total = season_results.love_hate_scorer.getCounts('H')
+
+	print("\n\n")
+	print("In total, Berry hit on {} loves out of {} ({}%)".format(
+				getStringInColor(Fore.GREEN, total_love_correct),
+				getStringInColor(Fore.RED, total_love_total),
+				getStringInColor(Fore.GREEN, str((total_love_correct * 100) / total_love_total) if total_love_total else "-")))
+	print("In total, Berry hit on {} hates out of {} ({}%)".format(
+				getStringInColor(Fore.GREEN, total_hate_correct),
+				getStringInColor(Fore.RED, total_hate_total), 
+				getStringInColor(Fore.GREEN, str((total_hate_correct) * 100 / total_hate_total) if total_hate_total else "-")))
+
+	for lh, label in [('L', "loves"), ('H', "hates")]:
+		significance = summary['significance']['love_hate'].get(lh)
+		if significance:
+			print("\tRandom {} would have hit {}% of the time. {}% confidence interval: [{}%, {}%], p = {}".format(label,
+				str(significance['chance'] * 100)[:5], int(CONFIDENCE * 100), str(significance['ci_low'] * 100)[:5],
+				str(significance['ci_high'] * 100)[:5], getStringInColor(Fore.GREEN, str(significance['p_value'])[:5])))
+
+	# TODO: Check which players were loved the most and hated the most. How accurate was he on each?
+
+	weeks_order = summary['trends']['weeks_order']
+	if weeks_order:
+		print("\n\nHere are the weeks, ranked from best to worst predicted (average Kendall coefficient across positions):")
+		for i, (week, coefficient) in enumerate(weeks_order, start=1):
+			print("{}) Week {} ({})".format(i, getStringInColor(Fore.YELLOW, week), str(coefficient)[:5]))
+
+
+########################################## BATCH ##########################################
+
+def analyzeShard(shard):
+	# Runs in a worker process, so everything it needs comes in through the shard and is loaded once per process.
+	# Returns the week's results along with the spans and counters profiling took for it, which the parent adds to its own.
+	global OFFLINE
+	season, week, positions, sources, profiles, offline, profile_mode = shard
+	OFFLINE = offline
+	if profile_mode:
+		enableProfiling(profile_mode, report=False) # Forked workers inherit the wrapped functions; spawned ones don't.
+		PROFILE_SPANS.clear() # Only this shard's, not whatever a forked worker inherited from the parent.
+		PROFILE_COUNTERS.clear()
+
+	try:
+		stats = getWeekStats(week, season)
+	except (StatsUnavailableError, requests.RequestException) as e:
+		all_week_results = [{'season': season, 'week': week, 'scoring': profile, 'rankings': dict(), 'love_hate': None, 'error': str(e)} for profile in profiles]
+	else:
+		scoreWeeks([(week, stats)], profiles, season) # Every profile's points in one pass over the stats.
+		all_week_results = analyzeWeekProfiles(week, stats, season, positions, sources, profiles) # Each file is parsed once for all of them.
+
+	return all_week_results, PROFILE_SPANS, PROFILE_COUNTERS
+
+def getJsonSafe(value):
+	if isinstance(value, dict):
+		return {str(k): getJsonSafe(v) for (k, v) in value.items()}
+	if isinstance(value, (list, tuple, np.ndarray)):
+		return [getJsonSafe(v) for v in value]
+	if isinstance(value, np.generic):
+		value = value.item()
+	if isinstance(value, float) and value != value: # NaN isn't valid JSON.
+		return None
+	return value
+
+def writeBatchReport(all_week_results, output_path, output_format):
+	# all_week_results must already be in (season, week) order so that the report is deterministic. The first scoring
+	# profile's results go at the top of each season; any others go under "scoring", keyed by profile.
+	seasons_results = dict()
+	profiles = list()
+	for week_results in all_week_results:
+		season_key = (week_results['season'], week_results['scoring'])
+		if week_results['scoring'] not in profiles: profiles.append(week_results['scoring'])
+		if season_key not in seasons_results:
+			seasons_results[season_key] = SeasonResults(*season_key)
+		if 'error' not in week_results:
+			seasons_results[season_key].add(week_results)
+
+	output_file = sys.stdout if output_path == "-" else open(output_path, "w", newline="")
+	try:
+		if output_format == "json":
+			report = {'seasons': dict()}
+			for (season, profile), season_results in seasons_results.items():
+				season_report = {
+					'summary': season_results.getSummary(),
+					'weeks': [week_results for week_results in all_week_results if (week_results['season'], week_results['scoring']) == (season, profile)],
+				}
+				if profile == profiles[0]:
+					report['seasons'][season] = season_report
+				else:
+					report['seasons'][season].setdefault('scoring', dict())[profile] = season_report
+			json.dump(getJsonSafe(report), output_file, indent=2)
+			output_file.write("\n")
+		else:
+			writer = csv.writer(output_file)
+			writer.writerow(["season", "week", "position", "n"] + RANKING_METRICS_LIST + ["love_correct", "love_total", "hate_correct", "hate_total", "scoring"])
+			for week_results in all_week_results:
+				season, week = week_results['season'], week_results['week']
+				love_hate_scorer = seasons_results[(season, week_results['scoring'])].love_hate_scorer
+				positions = list(week_results['rankings']) or [pick['position'].lower() for pick in week_results['love_hate'] or list()]
+				for position in sorted(set(positions), key=ALL_POSITIONS_LIST.index):
+					metrics = week_results['rankings'].get(position) or dict()
+					writer.writerow([season, week, position, metrics.get('n', "")] +
+						[getJsonSafe(metrics.get(metric, "")) for metric in RANKING_METRICS_LIST] +
+						list(love_hate_scorer.getCounts('L', week, position.upper())) + list(love_hate_scorer.getCounts('H', week, position.upper())) +
+						[week_results['scoring']])
+	finally:
+		if output_file is not sys.stdout:
+			output_file.close()
+
+def runBatch(argv):
+	parser = argparse.ArgumentParser(prog="fantasy.py batch", description="Analyze one or more seasons without any prompts.")
+	parser.add_argument("--seasons", default=str(SEASON), help="comma-separated seasons or a range, e.g. 2018,2019 or 2017-2019")
+	parser.add_argument("--weeks", default="", help="a week or range of weeks, e.g. 3-16 (default: every week played so far)")
+	parser.add_argument("--positions", default=",".join(ALL_POSITIONS_LIST), help="comma-separated positions")
+	parser.add_argument("--sources", default=",".join(ALL_SOURCES_LIST), help="comma-separated sources to evaluate")
+	parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+	parser.add_argument("--output", default="-", help="output file, or - for stdout")
+	parser.add_argument("--format", choices=["json", "csv"], help="output format (default: from the output file's extension)")
+	parser.add_argument("--scoring", default=SCORING_PROFILE, help="comma-separated scoring profiles to evaluate, e.g. sleeper,half_ppr,te_premium")
+	parser.add_argument("--offline", action="store_true", help="only use cached stats")
+	parser.add_argument("--profile", action="store_true", help="report time spent per stage (handled before the command runs)")
+	parser.add_argument("--cprofile", action="store_true", help="also run cProfile (handled before the command runs)")
+	options = parser.parse_args(argv)
+
+	seasons = list()
+	for part in options.seasons.split(","):
+		seasons.extend(range(int(part.split("-")[0]), int(part.split("-")[-1]) + 1))
+	positions = [position.strip().lower() for position in options.positions.split(",") if position.strip()]
+	sources = [source.strip() for source in options.sources.split(",") if source.strip()]
+	for source in sources:
+		if source not in ALL_SOURCES_LIST:
+			parser.error("unknown source {} (choose from {})".format(source, ", ".join(ALL_SOURCES_LIST)))
+	profiles = [profile.strip() for profile in options.scoring.split(",") if profile.strip()]
+	for profile in profiles:
+		try:
+			getScoringProfile(profile)
+		except ValueError as e:
+			parser.error(str(e))
+
+	shards = list()
+	for season in sorted(set(seasons)):
+		for week in parseWeeks(options.weeks, season):
+			if 1 <= week <= getLastWeek(season):
+				# Workers time their spans but leave cProfile to this process.
+				shards.append((season, week, positions, sources, profiles, options.offline or OFFLINE, PROFILE_MODE and "1"))
+
+	all_week_results = list()
+	with ProcessPoolExecutor(max_workers=max(1, min(options.workers, len(shards)))) as executor:
+		for (shard_results, spans, counters) in executor.map(analyzeShard, shards): # map() keeps the shards' order.
+			all_week_results.extend(shard_results)
+			mergeProfile(spans, counters)
+
+	for week_results in all_week_results:
+		if 'error' in week_results:
+			print("Skipped week {} of {}: {}".format(week_results['week'], week_results['season'], week_results['error']), file=sys.stderr)
+
+	output_format = options.format or ("csv" if options.output.endswith(".csv") else "json")
+	writeBatchReport(all_week_results, options.output, output_format)
+
+
+########################################## WATCH ##########################################
+
+def getWeekSignature(week, season=SEASON):
+	# (name, mtime, size) of every file in the week's directory, or None if there's no directory yet.
+	try:
+		return tuple(sorted((entry.name, entry.stat().st_mtime_ns, entry.stat().st_size) for entry in os.scandir(getWeekDirectory(week, season))))
+	except OSError:
+		return None
+
+def pollWeek(week, season, watched):
+	# Returns the week's stats if its files or its stats changed since the last poll, otherwise None. Final weeks'
+	# stats are only reloaded when their cache file changes; other weeks' are rechecked every poll, which refetches them
+	# once the stats cache's TTL runs out.
+	files = getWeekSignature(week, season)
+	if files is None:
+		return None
+
+	def getCacheMtime():
+		path = getStatsCachePath(week, season)
+		return os.path.getmtime(path) if os.path.exists(path) else None
+
+	previous = watched.get(week)
+	if previous is None or not isWeekFinal(week, season) or previous[1] != getCacheMtime():
+		WEEK_STATS_MEMO.pop((season, week), None)
+
+	try:
+		stats = getWeekStats(week, season)
+	except (StatsUnavailableError, requests.RequestException) as e:
+		if previous is None or previous[2] is not None:
+			print(getStringInColor(Fore.YELLOW, "Skipping week {} of {} for now: {}".format(week, season, e)))
+		watched[week] = (files, getCacheMtime(), None)
+		return None
+
+	stats_hash = getStatsHash(week, stats, season)
+	watched[week] = (files, getCacheMtime(), stats_hash)
+	if previous is not None and previous[0] == files and previous[2] == stats_hash:
+		return None
+	return stats
+
+def runWatch(argv):
+	global OFFLINE
+	parser = argparse.ArgumentParser(prog="fantasy.py watch", description="Re-analyze weeks as their files or stats change.")
+	parser.add_argument("--season", type=int, default=SEASON)
+	parser.add_argument("--weeks", default="", help="a week or range of weeks, e.g. 3-16 (default: every week played so far)")
+	parser.add_argument("--positions", default=",".join(ALL_POSITIONS_LIST), help="comma-separated positions")
+	parser.add_argument("--scoring", default=SCORING_PROFILE, help="scoring profile")
+	parser.add_argument("--interval", type=float, default=60, help="seconds between polls")
+	parser.add_argument("--output", help="also write each refreshed summary to this JSON file")
+	parser.add_argument("--once", action="store_true", help="poll once and exit")
+	parser.add_argument("--offline", action="store_true", help="only use cached stats")
+	parser.add_argument("--profile", action="store_true", help="report time spent per stage (handled before the command runs)")
+	parser.add_argument("--cprofile", action="store_true", help="also run cProfile (handled before the command runs)")
+	options = parser.parse_args(argv)
+	OFFLINE = OFFLINE or options.offline
+
+	try:
+		getScoringProfile(options.scoring)
+	except ValueError as e:
+		parser.error(str(e))
+	positions = [position.strip().lower() for position in options.positions.split(",") if position.strip()]
+
+	# The registry and the name index stay loaded for as long as this runs, as do the cumulative results, which only
+	# ever get updated one week at a time.
+	getNameIndex()
+	season_results = SeasonResults(options.season, options.scoring)
+	watched = dict() # Maps from week to (files signature, stats cache mtime, stats hash) as of the last poll.
+
+	print("Watching week directories and stats for {} every {}s. Press Ctrl+C to stop.".format(options.season, options.interval))
+	try:
+		while True:
+			weeks = [week for week in parseWeeks(options.weeks, options.season) if 1 <= week <= getLastWeek(options.season)]
+			changed = list()
+			for week in weeks:
+				stats = pollWeek(week, options.season, watched)
+				if stats is None: continue
+
+				week_results = analyzeWeek(week, stats, options.season, positions, profile=options.scoring)
+				season_results.discard(week)
+				season_results.add(week_results)
+				changed.append(week)
+
+			if changed:
+				print("\nUpdated week(s) {} at {}.".format(", ".join(map(str, changed)), time.strftime("%H:%M:%S")))
+				summary = season_results.getSummary()
+				printCumulativeResults(season_results, min(season_results.weeks), max(season_results.weeks), summary)
+				if options.output:
+					tmp_path = "{}.{}.tmp".format(options.output, os.getpid())
+					with open(tmp_path, "w") as output_file:
+						json.dump(getJsonSafe(summary), output_file, indent=2)
+					os.replace(tmp_path, options.output)
+
+			if options.once: break
+			time.sleep(options.interval)
+	except KeyboardInterrupt:
+		print("\nStopped watching.")
+
+
+########################################## PROFILING ##########################################
+
+def countEvent(name, amount=1):
+	if PROFILE_MODE:
+		with PROFILE_LOCK:
+			PROFILE_COUNTERS[name] = PROFILE_COUNTERS.get(name, 0) + amount
+
+def getTimedFunction(name, fn):
+	@functools.wraps(fn)
+	def timed(*args, **kwargs):
+		start = time.perf_counter()
+		try:
+			return fn(*args, **kwargs)
+		finally:
+			elapsed = time.perf_counter() - start
+			with PROFILE_LOCK:
+				span = PROFILE_SPANS.setdefault(name, [0, 0.0])
+				span[0] += 1
+				span[1] += elapsed
+
+	return timed
+
+def enableProfiling(mode="1", report=True):
+	# Swaps the module-level functions for timed wrappers. Calls between them go through the module's globals, so they
+	# all get timed, and nothing is wrapped (or slower) unless profiling is turned on. Batch workers pass report=False
+	# and hand their spans and counters back to the parent instead.
+	global PROFILE_MODE, PROFILER
+	PROFILE_MODE = mode
+
+	module_globals = globals()
+	for name in PROFILED_FUNCTIONS_LIST:
+		if not hasattr(module_globals[name], "__wrapped__"):
+			module_globals[name] = getTimedFunction(name, module_globals[name])
+
+	if mode == "cprofile" and PROFILER is None:
+		PROFILER = cProfile.Profile()
+		PROFILER.enable()
+
+	if report:
+		atexit.register(reportProfile)
+
+def mergeProfile(spans, counters):
+	# Adds a worker process's spans and counters to this process's. Worker spans add up across processes, so in batch
+	# runs they can exceed the wall time.
+	with PROFILE_LOCK:
+		for name, (calls, total) in spans.items():
+			span = PROFILE_SPANS.setdefault(name, [0, 0.0])
+			span[0] += calls
+			span[1] += total
+		for name, count in counters.items():
+			PROFILE_COUNTERS[name] = PROFILE_COUNTERS.get(name, 0) + count
+
+def reportProfile():
+	if PROFILER is not None:
+		PROFILER.disable()
+
+	# Spans are inclusive, so e.g. analyzeWeek's time also counts toward compareRankings' when one calls the other.
+	report = {
+		'spans': {name: {'calls': calls, 'total_seconds': total, 'average_ms': (total * 1000) / calls}
+			for (name, (calls, total)) in sorted(PROFILE_SPANS.items(), key=lambda x: x[1][1], reverse=True)},
+		'counters': dict(sorted(PROFILE_COUNTERS.items())),
+	}
+
+	if PROFILE_OUTPUT:
+		with open(PROFILE_OUTPUT, "w") as profile_file:
+			json.dump(report, profile_file, indent=2)
+		if PROFILER is not None:
+			PROFILER.dump_stats(os.path.splitext(PROFILE_OUTPUT)[0] + ".prof")
+		return
+
+	print("\n\n" + getDashedString(color=Fore.CYAN))
+	print("{:<28}{:>10}{:>14}{:>14}".format("Stage", "Calls", "Total (s)", "Average (ms)"))
+	for name, span in report['spans'].items():
+		print("{:<28}{:>10}{:>14.3f}{:>14.3f}".format(name, span['calls'], span['total_seconds'], span['average_ms']))
+	if report['counters']:
+		print("")
+		for name, count in report['counters'].items():
+			print("{:<28}{:>10}".format(name, count))
+
+	if PROFILER is not None:
+		print("")
+		pstats.Stats(PROFILER).sort_stats("cumulative").print_stats(20)
 
 
 ########################################## MAIN ##########################################
@@ -198,15 +2252,38 @@ if __name__ == "__main__":
 		warnings.simplefilter("ignore")
 		fxn()
 
-		for _ in range(2):
-			try:
-				with open("players_fixed.json") as json_file:
-					players_dict = json.load(json_file)
-					break
-			except:
-				fixJsonFile()
+		args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+		if "--offline" in sys.argv:
+			OFFLINE = True
+		if "--cprofile" in sys.argv or PROFILE_MODE == "cprofile":
+			enableProfiling("cprofile")
+		elif "--profile" in sys.argv or PROFILE_MODE:
+			enableProfiling()
+
+		if len(args) >= 1 and args[0] == "serve":
+			serveStats(int(args[1]) if len(args) == 2 else 8000)
+			sys.exit()
+
+		if len(args) >= 1 and args[0] == "batch":
+			runBatch(sys.argv[sys.argv.index("batch")+1:])
+			sys.exit()
 
-		if len(sys.argv) == 2 and sys.argv[1] == "rankings":
+		if len(args) >= 1 and args[0] == "watch":
+			runWatch(sys.argv[sys.argv.index("watch")+1:])
+			sys.exit()
+
+		if len(args) == 1 and args[0] == "import":
+			importRankings()
+			sys.exit()
+
+		for arg in sys.argv[1:]:
+			if arg.startswith("--scoring="):
+				SCORING_PROFILE = arg.split("=", 1)[1]
+				getScoringProfile(SCORING_PROFILE) # Fails early on an unknown profile.
+
+		getPlayerRegistry()
+
+		if len(args) == 1 and args[0] == "rankings":
 			weeks_response = getValidInput("Enter the week or range of weeks (separated by a dash) that you want to see cumulative rankings for. Press enter to include everything: ",
 				lambda x: all([char.isdigit() or char == '-' for char in x]))
 			positions_response = getValidInput("Enter the position(s) (separated by commas) that you want to see cumulative rankings for. Press enter to include everything: ",
@@ -223,6 +2300,7 @@ if __name__ == "__main__":
 			lambda x: x.lower() in ["y", "n"])
 		skip_to_cumulative = (skip_response == 'y')
 
+		show_lh_players = False
 		if not skip_to_cumulative:
 			lh_response = getValidInput("Do you want to see per-player results for love/hate (y/n)? ",
 				lambda x: x.lower() in ["y", "n"])
@@ -243,180 +2321,24 @@ if __name__ == "__main__":
 			print(getStringInColor(Fore.YELLOW, "Warning: Changing the last week to {} because that's the most current week so far.".format(getCurrentWeek())))
 			end_week = getCurrentWeek()
 
-		results_dict = dict() # Maps from position group to weekly results.
-		players_results_dict = dict() # Maps from position to player name to weekly results.
-		love_hate_dict = dict() # Maps from player name to week to love/hate results.
-		total_love_correct = total_love_total = total_hate_correct = total_hate_total = 0
+		season_results = SeasonResults()
 
 
 		##### Let's do some analysis boiiii #####
 
-		for current_week in range(start_week, end_week + 1):
+		for current_week, stats in prefetchWeekStats(range(start_week, end_week + 1)):
 			if not skip_to_cumulative and current_week != start_week:
 				_ = input("\n")
 
 			if not skip_to_cumulative:
 				print("\n\n" + getDashedString(color=Fore.MAGENTA) + "\n")
 
-			response = requests.get("https://api.sleeper.app/v1/stats/nfl/regular/2019/{}".format(current_week))
-			stats = response.json()
-
-			### First, compare rankings to actual performances for each position group.
-			for position in ALL_POSITIONS_LIST:
-				if position not in players_results_dict: players_results_dict[position] = dict()
-
-				file_path = "week{}/{}.txt".format(current_week, position)
-				if not os.path.exists(file_path):
-					print("\nNo rankings file found for {}s in week {}...skipping.".format(position.upper(), current_week))
-					continue
-
-				# Extract the predicted rankings from the position's rankings file.
-				with open(file_path) as position_rankings_file:
-					rankings_list = list()
-
-					# Iterate through the lines of rankings and extract each player name.
-					text = position_rankings_file.readlines()
-					for i in range(0, len(text), 2):
-						match = re.search(r'[0-9]\. (.*), ', text[i])
-						if match:
-							rankings_list.append(normalizePlayerName(match.group(1)))
-							if position == 'def':
-								rankings_list[-1] = rankings_list[-1].replace(" D/ST", "")
-
-				# Then compile a sorted list of player's actual performances in the given week.
-				stats_list, stats_list_names = getPositionResults(position, current_week, stats)
-
-				# Add up the differences between predicted and real rankings.
-				difference_sum = 0
-				for rank, p in enumerate(stats_list_names, start=1):
-					if p in rankings_list:
-						difference_sum += abs((rankings_list.index(p) + 1) - rank)
-
-				# To make sure the coefficient works, only include the players that the two lists have in common.
-				rankings_list_common = [p for p in rankings_list if p in stats_list_names]
-				stats_list_names_common = [p for p in stats_list_names if p in rankings_list_common]
-				assert(len(rankings_list_common) == len(set(rankings_list_common)))
-
-				for p in rankings_list_common:
-					if p not in players_results_dict[position]:
-						players_results_dict[position][p] = dict()
-					if current_week not in players_results_dict[position][p]:
-						players_results_dict[position][p][current_week] = abs(rankings_list_common.index(p) - stats_list_names_common.index(p))
-
-				# Calculate the Kendall coefficient and the average difference between predicted and real rankings for
-				# this position group in this week.
-				coef, p = kendalltau(rankings_list_common, stats_list_names_common)
-				coef = abs(coef)
-				avg_difference = difference_sum / (pow(len(rankings_list_common), 2))
-
-				if not skip_to_cumulative:
-					print("\nResults for {} in week {} (# players = {}):".format(getStringInColor(Fore.YELLOW, position.upper() + "s"), current_week, len(rankings_list_common)))
-					print("\t\tKendall's correlation coefficient: {}".format(getStringInColor(Fore.GREEN, str(coef)[:5])))
-					print("\t\tThe average difference score between predicted and real rankings was {}.".format(getStringInColor(Fore.GREEN, avg_difference)))
-
-				if position not in results_dict: results_dict[position] = dict()
-				if current_week not in results_dict[position]: results_dict[position][current_week] = dict()
-
-				results_dict[position][current_week]['coefficient'] = coef
-				results_dict[position][current_week]['avg_difference'] = avg_difference
-
-			### Second, compare Berry's love/hate to actual performances.
-			file_path = "week{}/love_hate.txt".format(current_week)
-			if not os.path.exists(file_path):
-				print("\nNo rankings file found for {}s in week {}...skipping.".format(position.upper(), current_week))
+			if stats is None:
 				continue
 
-			with open(file_path) as lh_file:
-
-				if not skip_to_cumulative:
-					print("\n\nMatthew Berry's love/hate results for week {}:\n".format(current_week))
-
-				love_hate_position_list = ['QB', 'RB', 'WR', 'TE']
-				love_hate_string = ""
-				love_hate_pos = ""
-
-				for position in love_hate_position_list:
-					POSITION_POINTS_DICT[current_week][position] = sorted(POSITION_POINTS_DICT[current_week][position])
-
-				for line in lh_file.readlines():
-					if line.strip() == '': continue
-
-					position, lh, full_name = map(str.strip, line.split("/"))
-					full_name = normalizePlayerName(full_name)
-
-					if full_name not in PLAYER_ID_CACHE:
-						if not skip_to_cumulative:
-							print(getStringInColor(Fore.YELLOW, "\nWarning: {} not found in cache\n".format(full_name)))
-						continue
-
-					player_id = PLAYER_ID_CACHE[full_name]
-					if player_id not in stats or 'pts_ppr' not in stats[player_id]:
-						if not skip_to_cumulative:
-							print(getStringInColor(Fore.YELLOW, "\nWarning: {} doesn't have stats for week {}\n".format(full_name, current_week)))
-						continue
-
-					percentile = getPercentile(POSITION_POINTS_DICT[current_week][position], stats[player_id]['pts_ppr'])
-
-					if full_name not in love_hate_dict: love_hate_dict[full_name] = dict()
-
-
-					prediction_was_correct = (lh == 'L' and percentile >= 67) or (lh == 'H' and percentile <= 33)
-					love_hate_dict[full_name][current_week] = (position, lh, prediction_was_correct)
-
-					if not skip_to_cumulative and show_lh_players:
-						if position != love_hate_pos:
-							print("{}:".format(getStringInColor(Fore.YELLOW, position)))
-						love_hate_pos = position
-
-						if lh != love_hate_string:
-							print("\t{}:".format("love" if lh == 'L' else "hate"))
-						love_hate_string = lh
-						
-						print(getStringInColor(Fore.GREEN if prediction_was_correct else Fore.RED,
-							"\t\t\t{}: {} pts ({} percentile)".format(
-							full_name,
-							stats[player_id]['pts_ppr'],
-							percentile)))
-				
-				if not skip_to_cumulative and show_lh_players:
-					print("\n")
-
-				for position in love_hate_position_list:
-					
-					love_correct = len([1 for p in love_hate_dict if current_week in love_hate_dict[p] and love_hate_dict[p][current_week] == (position, 'L', True)])
-					love_total = len([1 for p in love_hate_dict if current_week in love_hate_dict[p] and love_hate_dict[p][current_week][0] == position and love_hate_dict[p][current_week][1] == 'L'])
-					hate_correct = len([1 for p in love_hate_dict if current_week in love_hate_dict[p] and love_hate_dict[p][current_week] == (position, 'H', True)])
-					hate_total = len([1 for p in love_hate_dict if current_week in love_hate_dict[p] and love_hate_dict[p][current_week][0] == position and love_hate_dict[p][current_week][1] == 'H'])
-					
-					if not skip_to_cumulative and love_total + hate_total > 0:
-						print("\tHe hit on {} (out of {}) {} loves and {} (out of {}) hates ({} correct in total)".format(
-							getStringInColor(Fore.GREEN, love_correct),
-							getStringInColor(Fore.RED, love_total),
-							getStringInColor(Fore.YELLOW, position),
-							getStringInColor(Fore.GREEN, hate_correct),
-							getStringInColor(Fore.RED, hate_total),
-							getStringInColor(Fore.GREEN, str(((love_correct + hate_correct) * 100) / (love_total + hate_total))[:5] + "%")))
-
-				love_correct = len([1 for p in love_hate_dict if current_week in love_hate_dict[p] and love_hate_dict[p][current_week][1:] == ('L', True)])
-				love_total = len([1 for p in love_hate_dict if current_week in love_hate_dict[p] and love_hate_dict[p][current_week][1] == 'L'])
-				hate_correct = len([1 for p in love_hate_dict if current_week in love_hate_dict[p] and love_hate_dict[p][current_week][1:] == ('H', True)])
-				hate_total = len([1 for p in love_hate_dict if current_week in love_hate_dict[p] and love_hate_dict[p][current_week][1] == 'H'])
-
-				total_love_correct += love_correct
-				total_love_total += love_total
-				total_hate_correct += hate_correct
-				total_hate_total += hate_total
-
-				if not skip_to_cumulative:
-					print("\n")
-					print("\tIn total, he hit on {} loves out of {} ({}%)".format(
-						getStringInColor(Fore.GREEN, love_correct),
-						getStringInColor(Fore.RED, love_total), 
-						getStringInColor(Fore.GREEN, str((love_correct * 100) / love_total))))
-					print("\tIn total, he hit on {} hates out of {} ({}%)".format(
-						getStringInColor(Fore.GREEN, hate_correct),
-						getStringInColor(Fore.RED, hate_total), 
-						getStringInColor(Fore.GREEN, str((hate_correct) * 100 / hate_total))))
+			week_results = analyzeWeek(current_week, stats)
+			season_results.add(week_results)
+			printWeekResults(week_results, season_results.love_hate_scorer, skip_to_cumulative, show_lh_players)
 
 		
 
@@ -429,54 +2351,4 @@ if __name__ == "__main__":
 				lambda x: x in ["y", "n"])
 
 		if cumulative_response == 'y':
-			print("\n\n" + getDashedString(lines=2, color=Fore.YELLOW) + "\n\n")
-			print("These are the cumulative results using {}:".format(
-				"week {}".format(start_week) if start_week == end_week else "weeks {}-{}".format(start_week, end_week)))
-			
-			cumulative_list = list()
-
-			for position in results_dict:
-				# Analyze the position group's prediction results overall first.
-				print("\n\n{}{}s{}:".format(Fore.YELLOW, position.upper(), Style.RESET_ALL))
-
-				avg_coefficient = average([results_dict[position][week]['coefficient'] for week in results_dict[position]])
-				print("\tAverage coefficient: {}".format(getStringInColor(Fore.GREEN, str(avg_coefficient)[:5])))
-
-				avg_avg_difference = average([results_dict[position][week]['avg_difference'] for week in results_dict[position]])
-				print("\tAverage of average differences: {}".format(getStringInColor(Fore.GREEN, str(avg_avg_difference)[:5])))
-				
-				cumulative_list.append((position.upper(), avg_coefficient, avg_avg_difference))
-
-				# Then analyze individual players within the position group.
-				p_results_list = list()
-				for p in players_results_dict[position]:
-					p_results_list.append((p, average([players_results_dict[position][p][week] for week in players_results_dict[position][p]])))
-				p_results_list = sorted(p_results_list, key=lambda x: x[1])
-
-				print("\nThe 3 most predictable {}s were:".format(position.upper()))
-				printRankings(3, p_results_list, parenMessage="average difference from correct rank:")
-
-				print("\nThe 3 most unpredictable {}s were:".format(position.upper()))
-				printRankings(3, p_results_list[::-1], reverseRank=True, parenMessage="average difference from correct rank:")
-
-
-			cumulative_list = sorted(cumulative_list, key=lambda x: x[2])
-			print("\n\nHere are the position groups, ranked from most predictable to least predictable:")
-			for i, pos in enumerate(cumulative_list, start=1):
-				print(str(i) + ") " + getStringInColor(Fore.YELLOW, pos[0]))
-			# print("\n\nThe most predictable position group was: {}".format(getStringInColor(Fore.YELLOW, cumulative_list[0][0])))
-			# print("\nThe most unpredictable position group was: {}".format(getStringInColor(Fore.YELLOW, cumulative_list[-1][0])))
-
-			print("\n\n")
-			print("In total, Berry hit on {} loves out of {} ({}%)".format(
-						getStringInColor(Fore.GREEN, total_love_correct),
-						getStringInColor(Fore.RED, total_love_total),
-						getStringInColor(Fore.GREEN, str((total_love_correct * 100) / total_love_total))))
-			print("In total, Berry hit on {} hates out of {} ({}%)".format(
-						getStringInColor(Fore.GREEN, total_hate_correct),
-						getStringInColor(Fore.RED, total_hate_total), 
-						getStringInColor(Fore.GREEN, str((total_hate_correct) * 100 / total_hate_total))))
-
-			# TODO: Check which players were loved the most and hated the most. How accurate was he on each?
-
-			# TODO: Rank the weeks from best to worst predicted.
\ No newline at end of file
+			printCumulativeResults(season_results, start_week, end_week)